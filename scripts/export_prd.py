@@ -24,8 +24,7 @@ def get_project_root() -> str:
 def setup_output_directory() -> str:
     """Create and return the outputs directory path."""
     output_dir = os.path.join(get_project_root(), 'outputs')
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
     return output_dir
 
 
@@ -1,12 +1,32 @@
-from paid.agents.design_agent import DesignAgent
-from paid.agents.visual_agents import MermaidAgent, ExcalidrawAgent
-from paid.agents.deepgram_agent import DeepgramConversationAgent
-from paid.agents.anthropic_deepgram_agent import AnthropicDeepgramAgent
+import importlib
+
+# Module that defines each agent. Agents are imported on first access, so importing
+# one agent (or any paid.agents submodule) doesn't load every other agent's SDK.
+_AGENT_MODULES = {
+    'VoiceAgent': 'paid.agents.voice_agent',
+    'DesignAgent': 'paid.agents.design_agent',
+    'MermaidAgent': 'paid.agents.visual_agents',
+    'ExcalidrawAgent': 'paid.agents.visual_agents',
+    'DeepgramConversationAgent': 'paid.agents.deepgram_agent',
+    'AnthropicDeepgramAgent': 'paid.agents.anthropic_deepgram_agent'
+}
 
 __all__ = [
+    'VoiceAgent',
     'DesignAgent',
     'MermaidAgent',
     'ExcalidrawAgent',
     'DeepgramConversationAgent',
     'AnthropicDeepgramAgent'
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    if name in _AGENT_MODULES:
+        agent = getattr(importlib.import_module(_AGENT_MODULES[name]), name)
+        # Cache on the package so later lookups skip __getattr__
+        globals()[name] = agent
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -11,7 +11,7 @@ import json
 from typing import Dict, Any, Optional, List, Callable
 
 from paid.agents.deepgram_agent import DeepgramConversationAgent
-from paid.database import add_conversation_message, get_latest_design_state, get_latest_instructions
+from paid.database import add_conversation_message, flush_conversations, get_latest_design_state, get_latest_instructions
 from paid.agents import DesignAgent
 from paid.defaults import DEFAULT_DESIGN_STATE, DEFAULT_INSTRUCTIONS_TEMPLATE
 
@@ -40,6 +40,7 @@ class AnthropicDeepgramAgent:
         self.current_user_transcript = ""
         self.current_agent_response = ""
         self.last_speaker = None  # Track who spoke last to detect turn changes
+        self.loop = None  # Event loop the agent was started on, used for work scheduled from other threads
         
         # Register callbacks
         self.deepgram_agent.register_callbacks(
@@ -158,16 +159,12 @@ class AnthropicDeepgramAgent:
                     # Update the design state based on the complete conversation
                     updated_state = self.design_agent.process(self.session_id, {})
                     
-                    # Create a new event loop for this thread to handle async operations
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    
-                    try:
-                        # Execute the refresh instructions method
-                        loop.run_until_complete(self._refresh_system_instructions())
-                    finally:
-                        # Close the loop
-                        loop.close()
+                    # Refresh the instructions on the loop the agent was started on rather
+                    # than creating and tearing down a new event loop for every turn
+                    if self.loop is not None and self.loop.is_running():
+                        asyncio.run_coroutine_threadsafe(self._refresh_system_instructions(), self.loop).result()
+                    else:
+                        asyncio.run(self._refresh_system_instructions())
                 except Exception as e:
                     print(f"Error updating design state: {e}")
             
@@ -200,6 +197,9 @@ class AnthropicDeepgramAgent:
         Returns:
             bool: True if the session started successfully, False otherwise
         """
+        # Remember the loop so later instruction refreshes can be scheduled on it
+        self.loop = asyncio.get_running_loop()
+        
         # Always use the complete system instructions (core defaults + design state + custom instructions)
         system_instructions = self._get_system_instructions()
         
@@ -218,6 +218,9 @@ class AnthropicDeepgramAgent:
             print(f"Saving final agent response on stop: {self.current_agent_response}")
             add_conversation_message(self.session_id, "agent", self.current_agent_response)
         
+        # Make sure this session's queued messages reach the database before shutting down
+        flush_conversations(self.session_id)
+        
         # Reset the conversation buffers
         self.current_user_transcript = ""
         self.current_agent_response = ""
@@ -245,34 +248,3 @@ class AnthropicDeepgramAgent:
         """
         # Directly update the agent's instructions
         return await self.deepgram_agent.update_instructions(new_instructions)
-
-# Example usage:
-"""
-async def main(session_id):
-    agent = AnthropicDeepgramAgent(session_id)
-    
-    try:
-        # Start the agent
-        await agent.start()
-        
-        # Send a test message
-        await agent.send_text("I want to design a mobile app for tracking fitness goals")
-        
-        # Keep running for a while to allow conversation
-        await asyncio.sleep(120)
-    finally:
-        # Stop the agent
-        await agent.stop()
-
-if __name__ == "__main__":
-    from paid.database import setup_database, create_session
-    
-    # Initialize database
-    setup_database()
-    
-    # Create a new session
-    session_id = create_session()
-    
-    # Run the example
-    asyncio.run(main(session_id))
-"""
\ No newline at end of file
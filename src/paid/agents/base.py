@@ -1,4 +1,6 @@
 import os
+import asyncio
+import threading
 from typing import Dict, Any, Optional, List
 from abc import ABC, abstractmethod
 
@@ -10,11 +12,29 @@ load_dotenv()
 class BaseAgent(ABC):
     """Base class for all agents in the system."""
     
+    # One client is shared by every agent so all Claude calls reuse the same
+    # pool of keep-alive connections instead of paying a new TLS handshake.
+    _shared_client: Optional[anthropic.Anthropic] = None
+    _client_lock = threading.Lock()
+    
     def __init__(self):
         """Initialize the agent with the Anthropic API client."""
-        self.client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.client = self._get_shared_client()
         self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-7-sonnet-20250219")
     
+    @staticmethod
+    def _get_shared_client() -> anthropic.Anthropic:
+        """
+        Get the process-wide Anthropic client, creating it on first use.
+        
+        Returns:
+            anthropic.Anthropic: The shared API client.
+        """
+        with BaseAgent._client_lock:
+            if BaseAgent._shared_client is None:
+                BaseAgent._shared_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            return BaseAgent._shared_client
+    
     @abstractmethod
     def process(self, session_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -27,4 +47,20 @@ class BaseAgent(ABC):
         Returns:
             Dict[str, Any]: The agent's response.
         """
-        pass
\ No newline at end of file
+        pass
+    
+    async def aprocess(self, session_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process input data without blocking the event loop.
+        
+        Runs process() in a worker thread so independent agents can be awaited
+        together with asyncio.gather and their API calls overlap.
+        
+        Args:
+            session_id: The ID of the current design session.
+            input_data: Input data for the agent to process.
+            
+        Returns:
+            Dict[str, Any]: The agent's response.
+        """
+        return await asyncio.to_thread(self.process, session_id, input_data)
\ No newline at end of file
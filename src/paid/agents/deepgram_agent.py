@@ -278,38 +278,3 @@ class DeepgramConversationAgent:
         else:
             print("Cannot update instructions: Deepgram Agent is not connected")
             return False
-
-# Example usage:
-"""
-async def main():
-    agent = DeepgramConversationAgent()
-    
-    # Define callback functions
-    def on_transcript(text):
-        print(f"User said: {text}")
-    
-    def on_agent_response(text):
-        print(f"Agent responded: {text}")
-    
-    # Register callbacks
-    agent.register_callbacks(on_transcript, on_agent_response)
-    
-    # Start conversation
-    await agent.start_conversation(
-        system_instructions="You are a product design assistant. Help users clarify their design concepts."
-    )
-    
-    # Keep the connection open for a while
-    try:
-        # Wait for interactions or send text directly
-        await agent.send_text("I'm designing a mobile app for tracking fitness goals")
-        
-        # Wait for responses
-        await asyncio.sleep(60)
-    finally:
-        # Stop the conversation
-        await agent.stop_conversation()
-
-if __name__ == "__main__":
-    asyncio.run(main())
-"""
\ No newline at end of file
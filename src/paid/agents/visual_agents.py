@@ -1,7 +1,11 @@
 from typing import Dict, Any, List, Optional
 import json
 import re
+import asyncio
+import functools
 import hashlib
+import threading
+from collections import OrderedDict
 
 from paid.agents.base import BaseAgent
 from paid.database import get_latest_design_state
@@ -179,6 +183,29 @@ class MermaidAgent(BaseAgent):
     C --> D[End]"""
 
 
+# Maximum number of diagrams requested from Claude at the same time
+_MAX_CONCURRENT_DIAGRAMS = 4
+
+# Diagram code keyed by the content hash of a single flow, shared by every manager so
+# an unchanged flow is never sent to Claude twice, even from a new session or page load
+_DIAGRAM_CACHE_SIZE = 256
+_diagram_cache: "OrderedDict[str, str]" = OrderedDict()
+_diagram_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_mermaid_agent() -> MermaidAgent:
+    """
+    Get the process-wide MermaidAgent, creating it on first use.
+    
+    The agent holds no per-session state, so every diagram manager can share it.
+    
+    Returns:
+        MermaidAgent: The shared Mermaid agent.
+    """
+    return MermaidAgent()
+
+
 class UserFlowDiagramManager:
     """Manages the generation and caching of user flow diagrams."""
     
@@ -190,38 +217,50 @@ class UserFlowDiagramManager:
             session_id: The current session ID
         """
         self.session_id = session_id
-        self.mermaid_agent = MermaidAgent()
+        self.mermaid_agent = _get_mermaid_agent()
         self.flow_diagrams = {}
         self.current_flows_hash = None
     
-    def get_user_flows_hash(self, user_flows):
+    def get_user_flows_hash(self, flow_hashes):
         """
         Generate a hash for user flows to detect changes.
         
         Args:
-            user_flows: List of user flow dictionaries
+            flow_hashes: The get_flow_hash value of each user flow, in order
             
         Returns:
             str: A hash string representing the current state of user flows
         """
-        if not user_flows:
+        if not flow_hashes:
             return "empty"
         
-        # Sort the dict keys to ensure consistent hashing
-        sorted_json = json.dumps(user_flows, sort_keys=True)
-        return hashlib.md5(sorted_json.encode()).hexdigest()
+        # Combine the per-flow hashes rather than serializing every flow a second time
+        return hashlib.md5("".join(flow_hashes).encode()).hexdigest()
+    
+    def get_flow_hash(self, flow):
+        """
+        Generate a hash for a single user flow, used to reuse its diagram while it is unchanged.
+        
+        Args:
+            flow: A user flow dictionary
+            
+        Returns:
+            str: A hash string representing the content of the flow
+        """
+        sorted_json = json.dumps(flow, sort_keys=True)
+        return hashlib.blake2b(sorted_json.encode(), digest_size=16).hexdigest()
     
-    def has_flows_changed(self, user_flows):
+    def has_flows_changed(self, flow_hashes):
         """
         Check if user flows have changed since last check.
         
         Args:
-            user_flows: Current user flows
+            flow_hashes: The get_flow_hash value of each current user flow
             
         Returns:
             bool: True if flows have changed, False otherwise
         """
-        new_hash = self.get_user_flows_hash(user_flows)
+        new_hash = self.get_user_flows_hash(flow_hashes)
         has_changed = new_hash != self.current_flows_hash
         self.current_flows_hash = new_hash
         return has_changed
@@ -239,38 +278,83 @@ class UserFlowDiagramManager:
         # Print debug info about flows
         print(f"User flows: {len(user_flows)} flows found")
         
+        # Hash each flow once; the hashes detect changes to the whole list and key the per-flow cache
+        flow_hashes = [self.get_flow_hash(flow) for flow in user_flows]
+        
         # If flows haven't changed, return cached diagrams
-        if not self.has_flows_changed(user_flows):
+        if not self.has_flows_changed(flow_hashes):
             print(f"Flows unchanged, returning {len(self.flow_diagrams)} cached diagrams")
             return self.flow_diagrams
             
         print("Flows changed, generating new diagrams")
         
-        # Clear existing diagrams
-        self.flow_diagrams = {}
-        
-        # Generate the first flow's diagram first, to ensure at least one is displayed
-        if len(user_flows) > 0 and user_flows[0].get("flowName") and user_flows[0].get("steps") and len(user_flows[0].get("steps")) > 0:
-            print(f"Generating diagram for first flow: {user_flows[0].get('flowName')}")
-            diagram_code = self.generate_mermaid_diagram(user_flows[0])
-            if diagram_code:
-                self.flow_diagrams[0] = diagram_code
-        
-        # Generate diagrams for the remaining flows
-        for i, flow in enumerate(user_flows):
-            if i == 0:  # Skip the first one which we already processed
-                continue
-                
-            if flow.get("flowName") and flow.get("steps") and len(flow.get("steps")) > 0:
-                print(f"Generating diagram for flow {i}: {flow.get('flowName')}")
-                # Generate diagram code for this flow
-                diagram_code = self.generate_mermaid_diagram(flow)
-                if diagram_code:
-                    self.flow_diagrams[i] = diagram_code
+        # Generate all diagrams concurrently, since each one is an independent API call
+        self.flow_diagrams = asyncio.run(self._generate_all_diagrams(user_flows, flow_hashes))
         
         print(f"Generated {len(self.flow_diagrams)} diagrams")
         return self.flow_diagrams
     
+    async def _generate_all_diagrams(self, user_flows, flow_hashes):
+        """
+        Generate diagrams for every complete user flow concurrently.
+        
+        Args:
+            user_flows: List of user flow dictionaries
+            flow_hashes: The get_flow_hash value of each user flow
+            
+        Returns:
+            Dict[int, str]: Dictionary mapping flow indices to diagram code
+        """
+        # Limit concurrent requests to stay within API rate limits
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_DIAGRAMS)
+        
+        async def generate(i, flow, flow_hash):
+            # Flows whose content hasn't changed keep their previous diagram
+            with _diagram_cache_lock:
+                if flow_hash in _diagram_cache:
+                    _diagram_cache.move_to_end(flow_hash)
+                    return i, _diagram_cache[flow_hash]
+            
+            async with semaphore:
+                print(f"Generating diagram for flow {i}: {flow.get('flowName')}")
+                diagram_code = await self.agenerate_mermaid_diagram(flow)
+            
+            if diagram_code:
+                with _diagram_cache_lock:
+                    _diagram_cache[flow_hash] = diagram_code
+                    # Evict the least recently used diagrams so the cache doesn't grow unbounded
+                    while len(_diagram_cache) > _DIAGRAM_CACHE_SIZE:
+                        _diagram_cache.popitem(last=False)
+            return i, diagram_code
+        
+        results = await asyncio.gather(*(
+            generate(i, flow, flow_hash)
+            for i, (flow, flow_hash) in enumerate(zip(user_flows, flow_hashes))
+            if flow.get("flowName") and flow.get("steps")
+        ))
+        
+        return {i: diagram_code for i, diagram_code in results if diagram_code}
+    
+    async def agenerate_mermaid_diagram(self, flow):
+        """
+        Generate a mermaid diagram for a single user flow without blocking the event loop.
+        
+        Args:
+            flow: A user flow dictionary
+            
+        Returns:
+            str: Mermaid diagram code or None if generation failed
+        """
+        try:
+            result = await self.mermaid_agent.aprocess(self.session_id, {
+                "diagram_type": "flowchart",
+                "design_state": flow
+            })
+            return result["diagram_code"]
+        except Exception as e:
+            print(f"Error generating mermaid diagram: {str(e)}")
+            return None
+    
     def generate_mermaid_diagram(self, flow):
         """
         Generate a mermaid diagram for a single user flow.
@@ -2,15 +2,225 @@
 # TODO: Voice is currently handled by anthropic_deepgram_agent.py
 
 import os
-import json
-from typing import Dict, Any, Optional, List
+import asyncio
+import hashlib
+import pathlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Iterator, AsyncIterable, AsyncIterator
 
 from elevenlabs.client import ElevenLabs
-from deepgram import DeepgramClient, DeepgramClientOptions
+from deepgram import DeepgramClient, DeepgramClientOptions, LiveOptions, LiveTranscriptionEvents
 from deepgram.clients.listen.v1.rest.options import PrerecordedOptions
 
+from paid import serialization
 from paid.agents.base import BaseAgent
 from paid.database import get_latest_design_state, add_conversation_message
+from paid.defaults import DEFAULT_DESIGN_STATE
+
+# Synthesized speech is cached on disk, and the most recent phrases in memory,
+# so stock phrases the agent repeats don't go back to ElevenLabs. Both caches are
+# keyed on the voice and text only, so every agent shares them.
+_TTS_MODEL = "eleven_turbo_v2"
+_TTS_CACHE_DIR = pathlib.Path(".tts_cache")
+_TTS_MEMORY_CACHE_SIZE = 512
+_TTS_DISK_CACHE_MAX_BYTES = 200 * 1024 * 1024
+_TTS_DISK_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # seconds since the audio was last used
+
+_tts_memory_cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+_tts_memory_cache_lock = threading.Lock()
+
+# Complete recordings are only transcribed once, so they get full formatting
+_FINAL_TRANSCRIPTION_OPTIONS = PrerecordedOptions(
+    model="nova-3",  # Using latest nova-3 model
+    smart_format=True,
+    language="en-US"
+)
+
+# Format of the raw audio chunks streamed to transcribe_stream: 16-bit little-endian
+# PCM, mono, at 16 kHz. Deepgram can't detect the format of headerless audio.
+_LIVE_ENCODING = "linear16"
+_LIVE_SAMPLE_RATE = 16000
+_LIVE_CHANNELS = 1
+
+# Live transcription favours fast interim hypotheses: no smart_format post-processing,
+# the model's default language, and a short endpointing window to detect end of speech
+_LIVE_TRANSCRIPTION_OPTIONS = LiveOptions(
+    model="nova-3",
+    encoding=_LIVE_ENCODING,
+    sample_rate=_LIVE_SAMPLE_RATE,
+    channels=_LIVE_CHANNELS,
+    interim_results=True,
+    no_delay=True,
+    endpointing=300
+)
+
+# How long to wait for Deepgram to flush the final transcript after the audio ends
+_FINALIZE_TIMEOUT = 5.0
+
+# Static prompt text is built once at import so every request sends a byte-identical
+# system prompt, which also keeps it eligible for provider-side prompt caching.
+_SYSTEM_PROMPT = """
+You are a voice design partner assistant that helps users think through their design ideas. 
+Your goal is to ask thoughtful questions that help the user clarify their design concept and requirements.
+
+Focus on understanding:
+1. The core problem the design aims to solve
+2. The target users and their needs
+3. Key features and functionality
+4. User flows and interactions
+5. Visual requirements and constraints
+
+Be conversational, encouraging, and concise in your responses. Ask one focused question at a time.
+Avoid overwhelming the user with too many questions at once.
+
+Your responses will be spoken aloud to the user, so keep them clear and concise.
+"""
+
+_USER_PROMPT_TEMPLATE = """
+Current Design Information:
+{design_context}
+
+User's message: {user_message}
+
+Please respond to the user's message, taking into account the current design information.
+Ask a thoughtful question to help refine the design further.
+"""
+
+def _strip_empty(value: Any) -> Any:
+    """
+    Recursively drop empty strings, lists and dictionaries from a design state.
+    
+    Args:
+        value: A design state, or any value nested within it.
+        
+    Returns:
+        Any: The value with empty entries removed, or None if nothing is left.
+    """
+    if isinstance(value, dict):
+        stripped = {key: _strip_empty(item) for key, item in value.items()}
+        return {key: item for key, item in stripped.items() if item is not None} or None
+    if isinstance(value, list):
+        stripped = [_strip_empty(item) for item in value]
+        return [item for item in stripped if item is not None] or None
+    if value == "":
+        return None
+    return value
+
+def _prune_tts_disk_cache() -> None:
+    """Delete cached audio that hasn't been used recently, oldest first, until the cache is under its size limit."""
+    try:
+        entries = []
+        for path in _TTS_CACHE_DIR.glob("*.mp3"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+    except OSError as e:
+        print(f"Error reading the speech cache: {e}")
+        return
+    
+    entries.sort()
+    total_size = sum(size for _, size, _ in entries)
+    expired = time.time() - _TTS_DISK_CACHE_MAX_AGE
+    
+    for last_used, size, path in entries:
+        if last_used >= expired and total_size <= _TTS_DISK_CACHE_MAX_BYTES:
+            break
+        try:
+            path.unlink()
+            total_size -= size
+        except OSError as e:
+            print(f"Error pruning the speech cache: {e}")
+
+def _read_tts_disk_cache(cache_path: pathlib.Path) -> Optional[bytes]:
+    """
+    Read cached audio from disk, marking it as recently used.
+    
+    Args:
+        cache_path: The cache file for the voice and text.
+        
+    Returns:
+        Optional[bytes]: The audio data, or None if it isn't cached.
+    """
+    try:
+        audio = cache_path.read_bytes()
+    except OSError:
+        return None
+    
+    try:
+        # The modification time doubles as the last use time for pruning
+        os.utime(cache_path)
+    except OSError:
+        pass
+    return audio
+
+def _write_tts_disk_cache(cache_path: pathlib.Path, audio: bytes) -> None:
+    """
+    Write audio to the disk cache and prune the cache back under its limits.
+    
+    Args:
+        cache_path: The cache file for the voice and text.
+        audio: The audio data.
+    """
+    try:
+        # Write to a temporary file first so readers never see a partial file
+        _TTS_CACHE_DIR.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_TTS_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Error caching synthesized speech: {e}")
+        return
+    
+    _prune_tts_disk_cache()
+
+def _synthesize_cached(elevenlabs_client: ElevenLabs, voice_id: str, text: str) -> bytes:
+    """
+    Synthesize speech, reusing audio previously generated for the same voice and text.
+    
+    Args:
+        elevenlabs_client: The ElevenLabs client to use on a cache miss. It isn't
+                           part of the cache key, so agents share cached audio.
+        voice_id: The ElevenLabs voice ID.
+        text: Text to convert to speech.
+        
+    Returns:
+        bytes: Audio data in bytes.
+    """
+    memory_key = (voice_id, text)
+    with _tts_memory_cache_lock:
+        audio = _tts_memory_cache.get(memory_key)
+        if audio is not None:
+            _tts_memory_cache.move_to_end(memory_key)
+            return audio
+    
+    cache_key = hashlib.sha1(f"{voice_id}|{_TTS_MODEL}|{text}".encode()).hexdigest()
+    cache_path = _TTS_CACHE_DIR / f"{cache_key}.mp3"
+    
+    audio = _read_tts_disk_cache(cache_path)
+    if audio is None:
+        audio = elevenlabs_client.generate(
+            text=text,
+            voice=voice_id,
+            model=_TTS_MODEL
+        )
+        # The SDK may return the audio as an iterator of chunks
+        if not isinstance(audio, bytes):
+            audio = b"".join(audio)
+        
+        _write_tts_disk_cache(cache_path, audio)
+    
+    with _tts_memory_cache_lock:
+        _tts_memory_cache[memory_key] = audio
+        _tts_memory_cache.move_to_end(memory_key)
+        # Evict the least recently used phrases so the cache doesn't grow unbounded
+        while len(_tts_memory_cache) > _TTS_MEMORY_CACHE_SIZE:
+            _tts_memory_cache.popitem(last=False)
+    
+    return audio
 
 class VoiceAgent(BaseAgent):
     """Agent that handles voice interactions with the user."""
@@ -29,6 +239,9 @@ class VoiceAgent(BaseAgent):
         # Initialize ElevenLabs for text-to-speech
         self.elevenlabs_client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
         self.voice_id = os.getenv("ELEVENLABS_VOICE_ID", "cgSgspJ2msm6clMCkdW9")  # Default voice
+        
+        # Speech synthesis runs in the background so the next user turn isn't blocked on it
+        self._tts_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tts")
     
     async def transcribe_audio(self, audio_data: bytes) -> str:
         """
@@ -40,18 +253,11 @@ class VoiceAgent(BaseAgent):
         Returns:
             str: Transcribed text.
         """
-        # Configure transcription options
-        options = PrerecordedOptions(
-            model="nova-3",  # Using latest nova-3 model
-            smart_format=True,
-            language="en-US"
-        )
-        
         try:
             # Send the audio for transcription
             response = await self.deepgram.listen.asyncio.v("1").prerecorded.transcribe_buffer(
                 audio_data,
-                options
+                _FINAL_TRANSCRIPTION_OPTIONS
             )
             
             # Extract the transcript from the response
@@ -68,9 +274,81 @@ class VoiceAgent(BaseAgent):
             print(f"Error transcribing audio: {e}")
             return ""
     
+    async def transcribe_stream(self, audio_source: AsyncIterable[bytes]) -> AsyncIterator[Tuple[bool, str]]:
+        """
+        Transcribe audio as it arrives using Deepgram's live streaming API.
+        
+        Unlike transcribe_audio, transcription starts with the first chunk rather than
+        after the whole utterance has been recorded. Interim results can be used to start
+        preparing a response before the user has finished speaking.
+        
+        Args:
+            audio_source: Async iterable of raw audio chunks, as 16-bit little-endian
+                          PCM, mono, at 16 kHz.
+            
+        Yields:
+            Tuple[bool, str]: Whether the transcript is final, and the transcript text.
+        """
+        # Transcripts are pushed by the websocket handlers; None marks the end of the stream
+        transcripts: asyncio.Queue = asyncio.Queue()
+        # Set once Deepgram has flushed the final transcript or the stream has ended
+        finished = asyncio.Event()
+        
+        async def on_transcript(client, result, **kwargs):
+            alternatives = result.channel.alternatives
+            if alternatives and alternatives[0].transcript:
+                await transcripts.put((bool(result.is_final), alternatives[0].transcript))
+            if result.from_finalize:
+                finished.set()
+                await transcripts.put(None)
+        
+        async def on_close(client, close=None, **kwargs):
+            finished.set()
+            await transcripts.put(None)
+        
+        async def on_error(client, error=None, **kwargs):
+            print(f"Error transcribing audio stream: {error}")
+            finished.set()
+            await transcripts.put(None)
+        
+        async def send_audio():
+            try:
+                async for audio_chunk in audio_source:
+                    await connection.send(audio_chunk)
+                
+                # Ask Deepgram to flush the remaining audio, and give up if it never answers
+                await connection.finalize()
+                await asyncio.wait_for(finished.wait(), _FINALIZE_TIMEOUT)
+            except asyncio.TimeoutError:
+                print("Timed out waiting for the final transcript")
+            except Exception as e:
+                print(f"Error streaming audio: {e}")
+            finally:
+                transcripts.put_nowait(None)
+        
+        connection = self.deepgram.listen.asyncwebsocket.v("1")
+        connection.on(LiveTranscriptionEvents.Transcript, on_transcript)
+        connection.on(LiveTranscriptionEvents.Close, on_close)
+        connection.on(LiveTranscriptionEvents.Error, on_error)
+        
+        if await connection.start(_LIVE_TRANSCRIPTION_OPTIONS) is False:
+            print("Failed to start Deepgram live transcription")
+            return
+        
+        sender = asyncio.create_task(send_audio())
+        try:
+            while True:
+                transcript = await transcripts.get()
+                if transcript is None:
+                    break
+                yield transcript
+        finally:
+            sender.cancel()
+            await connection.finish()
+    
     def synthesize_speech(self, text: str) -> bytes:
         """
-        Convert text to speech using ElevenLabs.
+        Convert text to speech using ElevenLabs, reusing cached audio for repeated phrases.
         
         Args:
             text: Text to convert to speech.
@@ -78,12 +356,7 @@ class VoiceAgent(BaseAgent):
         Returns:
             bytes: Audio data in bytes.
         """
-        audio = self.elevenlabs_client.generate(
-            text=text,
-            voice=self.voice_id,
-            model="eleven_turbo_v2"
-        )
-        return audio
+        return _synthesize_cached(self.elevenlabs_client, self.voice_id, text)
 
     def process(self, session_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -98,7 +371,35 @@ class VoiceAgent(BaseAgent):
         Returns:
             Dict[str, Any]: Dictionary containing:
                 - "response": Text response to the user.
-                - "audio": Audio bytes of the response (optional).
+                - "audio_future": Future resolving to the audio bytes of the response.
+                  Call result() (or asyncio.wrap_future) only when the audio is needed.
+        """
+        response_text = "".join(self.stream_response(session_id, input_data))
+        
+        # Generate speech from the response without waiting for it
+        audio_future = self._tts_pool.submit(self.synthesize_speech, response_text)
+        
+        return {
+            "response": response_text,
+            "audio_future": audio_future
+        }
+    
+    def stream_response(self, session_id: str, input_data: Dict[str, Any]) -> Iterator[str]:
+        """
+        Generate a text response to the user, yielding it as it is generated.
+        
+        The generator can be passed straight to st.write_stream so the response
+        appears as soon as the first tokens arrive. Both messages are recorded in
+        the conversation history.
+        
+        Args:
+            session_id: The ID of the current design session.
+            input_data: Dictionary containing:
+                - "user_message": Text of the user's message.
+                - "design_state": Current design state (optional).
+            
+        Yields:
+            str: Chunks of the response text.
         """
         user_message = input_data.get("user_message", "")
         
@@ -113,28 +414,22 @@ class VoiceAgent(BaseAgent):
         # Create a prompt that includes the current design state
         prompt = self._create_prompt(user_message, design_state)
         
-        # Generate response using Claude
-        response = self.client.messages.create(
+        # Stream the response from Claude
+        response_chunks = []
+        with self.client.messages.stream(
             model=self.model,
             max_tokens=1000,
             system=prompt["system"],
             messages=[
                 {"role": "user", "content": prompt["user"]}
             ]
-        )
-        
-        response_text = response.content[0].text
+        ) as stream:
+            for text in stream.text_stream:
+                response_chunks.append(text)
+                yield text
         
         # Record agent's response in conversation history
-        add_conversation_message(session_id, "agent", response_text)
-        
-        # Generate speech from the response
-        audio_data = self.synthesize_speech(response_text)
-        
-        return {
-            "response": response_text,
-            "audio": audio_data
-        }
+        add_conversation_message(session_id, "agent", "".join(response_chunks))
     
     def _create_prompt(self, user_message: str, design_state: Dict[str, Any]) -> Dict[str, str]:
         """
@@ -147,37 +442,21 @@ class VoiceAgent(BaseAgent):
         Returns:
             Dict[str, str]: Dictionary with "system" and "user" prompts.
         """
-        # Format the design state as a readable string
-        design_context = json.dumps(design_state, indent=2) if design_state else "No existing design information."
-        
-        system_prompt = """
-        You are a voice design partner assistant that helps users think through their design ideas. 
-        Your goal is to ask thoughtful questions that help the user clarify their design concept and requirements.
+        # Only send fields that have been filled in; the empty default skeleton is pure overhead
+        compact_state = None
+        if design_state and design_state != DEFAULT_DESIGN_STATE:
+            compact_state = _strip_empty(design_state)
         
-        Focus on understanding:
-        1. The core problem the design aims to solve
-        2. The target users and their needs
-        3. Key features and functionality
-        4. User flows and interactions
-        5. Visual requirements and constraints
-        
-        Be conversational, encouraging, and concise in your responses. Ask one focused question at a time.
-        Avoid overwhelming the user with too many questions at once.
-        
-        Your responses will be spoken aloud to the user, so keep them clear and concise.
-        """
-        
-        user_prompt = f"""
-        Current Design Information:
-        {design_context}
-        
-        User's message: {user_message}
-        
-        Please respond to the user's message, taking into account the current design information.
-        Ask a thoughtful question to help refine the design further.
-        """
+        # Compact, key-sorted JSON is faster to produce and stable between calls
+        if compact_state:
+            design_context = serialization.dumps(compact_state, sort_keys=True)
+        else:
+            design_context = "No existing design information."
         
         return {
-            "system": system_prompt,
-            "user": user_prompt
+            "system": _SYSTEM_PROMPT,
+            "user": _USER_PROMPT_TEMPLATE.format(
+                design_context=design_context,
+                user_message=user_message
+            )
         }
\ No newline at end of file
@@ -5,9 +5,13 @@ from paid.database.operations import (
     get_session,
     update_design_state,
     get_latest_design_state,
+    get_latest_design_states,
+    get_latest_design_states_with_ids,
     get_latest_instructions,
     add_conversation_message,
-    get_conversation_history
+    flush_conversations,
+    get_conversation_history,
+    get_session_version
 )
 
 __all__ = [
@@ -19,7 +23,11 @@ __all__ = [
     'get_session',
     'update_design_state',
     'get_latest_design_state',
+    'get_latest_design_states',
+    'get_latest_design_states_with_ids',
     'get_latest_instructions',
     'add_conversation_message',
-    'get_conversation_history'
+    'flush_conversations',
+    'get_conversation_history',
+    'get_session_version'
 ]
\ No newline at end of file
@@ -1,9 +1,20 @@
 import datetime
-import json
-from peewee import Model, SqliteDatabase, CharField, TextField, DateTimeField, AutoField, ForeignKeyField
+import zlib
+from peewee import Model, SqliteDatabase, CharField, TextField, BlobField, DateTimeField, AutoField, ForeignKeyField
+
+from paid import serialization
 
 # Initialize SQLite database
-db = SqliteDatabase('paid_design.db')
+# WAL mode with synchronous=NORMAL avoids an fsync on every conversation write
+# and lets the UI read while the agents are writing. Peewee applies these on connect.
+db = SqliteDatabase('paid_design.db', pragmas={
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64000,  # 64MB page cache
+    'mmap_size': 268435456,  # 256MB memory-mapped I/O
+    'foreign_keys': 1,
+    'temp_store': 'memory'
+})
 
 class BaseModel(Model):
     class Meta:
@@ -20,22 +31,32 @@ class DesignSession(BaseModel):
         return super(DesignSession, self).save(*args, **kwargs)
 
 class DesignState(BaseModel):
-    """Stores the current state of the design as a JSON object."""
+    """Stores the current state of the design as compressed JSON."""
     id = AutoField()
     session = ForeignKeyField(DesignSession, backref='states')
-    state_json = TextField()  # JSON string containing the design state
+    state_json = TextField(default='')  # Legacy uncompressed JSON, empty once migrated to state_blob
+    state_blob = BlobField(null=True)  # zlib-compressed JSON containing the design state
     instructions = TextField(null=True)  # Voice agent instructions associated with this state
     created_at = DateTimeField(default=datetime.datetime.now)
     
+    class Meta:
+        # Supports the latest-state lookup: WHERE session = ? ORDER BY created_at DESC
+        indexes = (
+            (('session', 'created_at'), False),
+        )
+    
     @property
     def state(self):
         """Returns the state as a Python dictionary."""
-        return json.loads(self.state_json)
+        if self.state_blob is not None:
+            return serialization.loads(zlib.decompress(self.state_blob))
+        return serialization.loads(self.state_json)
     
     @state.setter
     def state(self, value):
         """Sets the state from a Python dictionary."""
-        self.state_json = json.dumps(value)
+        self.state_blob = zlib.compress(serialization.dumps_bytes(value))
+        self.state_json = ''
 
 class Conversation(BaseModel):
     """Stores the conversation history for a design session."""
@@ -44,21 +65,23 @@ class Conversation(BaseModel):
     speaker = CharField()  # 'user' or 'agent'
     message = TextField()
     timestamp = DateTimeField(default=datetime.datetime.now)
+    
+    class Meta:
+        # Supports the history lookup: WHERE session = ? ORDER BY timestamp ASC
+        indexes = (
+            (('session', 'timestamp'), False),
+        )
 
 def initialize_db():
     """Initialize the database and create tables if they don't exist."""
-    # Check if the database is already connected
-    if not db.is_closed():
-        # Connection already open, just use it
-        pass
-    else:
-        # Open a new connection
-        db.connect()
+    # Connections are kept open for the lifetime of each thread, so reuse one if it's already open
+    db.connect(reuse_if_open=True)
     
-    # Check if we need to add the instructions column to DesignState
+    # Check if we need to add the instructions or state_blob columns to DesignState
     need_migration = False
+    need_blob_migration = False
     try:
-        # Try to create tables first
+        # Try to create tables first (safe mode also adds any missing indexes to existing tables)
         db.create_tables([DesignSession, DesignState, Conversation], safe=True)
         
         # Check if we need to add the instructions column
@@ -66,6 +89,11 @@ def initialize_db():
         if 'instructions' not in columns:
             need_migration = True
             print("Need to add instructions column to DesignState")
+        
+        # Check if we need to add the state_blob column
+        if 'state_blob' not in columns:
+            need_blob_migration = True
+            print("Need to add state_blob column to DesignState")
     except Exception as e:
         print(f"Database schema check error: {e}")
     
@@ -78,8 +106,26 @@ def initialize_db():
         except Exception as e:
             print(f"Migration error: {e}")
     
-    # Only close if we opened it
-    if db.is_closed():
-        pass
-    else:
-        db.close()
\ No newline at end of file
+    if need_blob_migration:
+        try:
+            # Add the state_blob column
+            db.execute_sql('ALTER TABLE designstate ADD COLUMN state_blob BLOB;')
+            print("Added state_blob column to DesignState")
+        except Exception as e:
+            print(f"Migration error: {e}")
+    
+    # Compress any rows still stored as plain JSON
+    try:
+        legacy_states = (DesignState
+                        .select()
+                        .where(DesignState.state_blob.is_null(), DesignState.state_json != ''))
+        with db.atomic():
+            migrated = 0
+            for design_state in list(legacy_states):
+                design_state.state = design_state.state
+                design_state.save(only=[DesignState.state_blob, DesignState.state_json])
+                migrated += 1
+        if migrated:
+            print(f"Compressed {migrated} design states")
+    except Exception as e:
+        print(f"Migration error: {e}")
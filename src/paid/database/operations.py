@@ -1,9 +1,42 @@
 import uuid
-from typing import Dict, Any, List, Optional
+import time
+import queue
+import atexit
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+from peewee import fn, Select
+
+from paid import serialization
 from paid.database.models import db, DesignSession, DesignState, Conversation, initialize_db
 
+# Conversation messages are persisted by a background writer so that logging
+# a message never blocks the voice agent on a SQLite transaction.
+_CONVERSATION_BATCH_SIZE = 64
+_CONVERSATION_BATCH_WINDOW = 0.05  # seconds to wait for more messages before writing
+
+_conversation_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+_writer_thread: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+# Queued messages not yet written, per session, so a reader only waits for its own
+# session's messages instead of the whole queue
+_pending_messages: Dict[str, int] = {}
+_pending_condition = threading.Condition()
+
+# Serialized snapshot of the latest design state per session, tagged with its
+# DesignState row ID. Reads still query the latest ID, so a state written
+# by another process or connection replaces the snapshot, and only the snapshot is
+# cached so callers always get their own copy. Least recently used sessions are evicted.
+_LATEST_STATE_CACHE_SIZE = 128
+_latest_state_cache: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+_latest_state_lock = threading.Lock()
+
+# Sessions looked up per query by get_latest_design_states_with_ids
+_STATE_LOOKUP_BATCH_SIZE = 500
+
 def create_session() -> str:
     """
     Create a new design session.
@@ -42,23 +75,66 @@ def update_design_state(session_id: str, state: Dict[str, Any], instructions: st
     Returns:
         DesignState: The newly created design state.
     """
-    session = get_session(session_id)
-    if not session:
-        raise ValueError(f"Session with ID {session_id} does not exist")
-    
-    design_state = DesignState(session=session)
+    # Assign the foreign key by raw ID to avoid an extra lookup query
+    design_state = DesignState(session=session_id)
     design_state.state = state
     if instructions is not None:
         design_state.instructions = instructions
     
     design_state.save()
     
+    _cache_latest_state(session_id, design_state.id, state)
+    
     return design_state
 
+def _cache_latest_state(session_id: str, state_id: int, state: Dict[str, Any]) -> None:
+    """
+    Store a snapshot of a session's latest design state.
+    
+    Args:
+        session_id: The ID of the session.
+        state_id: The ID of the DesignState row the state was read from or written to.
+        state: The design state.
+    """
+    snapshot = serialization.dumps_bytes(state)
+    
+    with _latest_state_lock:
+        cached = _latest_state_cache.get(session_id)
+        # Don't overwrite a newer state cached while we were reading
+        if cached is None or cached[0] <= state_id:
+            _latest_state_cache[session_id] = (state_id, snapshot)
+        _latest_state_cache.move_to_end(session_id)
+        
+        while len(_latest_state_cache) > _LATEST_STATE_CACHE_SIZE:
+            _latest_state_cache.popitem(last=False)
+
+def _cached_latest_state(session_id: str, state_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get a copy of a session's cached design state, if it is the given row's state.
+    
+    Args:
+        session_id: The ID of the session.
+        state_id: The ID of the session's latest DesignState row.
+        
+    Returns:
+        Optional[Dict[str, Any]]: A copy of the design state, or None if it isn't cached.
+    """
+    with _latest_state_lock:
+        cached = _latest_state_cache.get(session_id)
+        if cached is None or cached[0] != state_id:
+            return None
+        _latest_state_cache.move_to_end(session_id)
+    
+    return serialization.loads(cached[1])
+
 def get_latest_design_state(session_id: str) -> Optional[Dict[str, Any]]:
     """
     Get the latest design state for a session.
     
+    Every call runs one indexed query for the latest row ID, so states saved by
+    other processes are seen. A cached state only saves fetching, decompressing
+    and parsing the row. The returned dictionary is the caller's own copy.
+    
     Args:
         session_id: The ID of the session.
         
@@ -66,20 +142,85 @@ def get_latest_design_state(session_id: str) -> Optional[Dict[str, Any]]:
         Optional[Dict[str, Any]]: The latest design state as a dictionary if found, None otherwise.
     """
     try:
-        session = get_session(session_id)
-        if not session:
+        state_id = (DesignState
+                   .select(DesignState.id)
+                   .where(DesignState.session == session_id)
+                   .order_by(DesignState.created_at.desc())
+                   .limit(1)
+                   .scalar())
+        
+        if state_id is None:
             return None
         
-        state = (DesignState
-                .select()
-                .where(DesignState.session == session)
-                .order_by(DesignState.created_at.desc())
-                .first())
+        cached_state = _cached_latest_state(session_id, state_id)
+        if cached_state is not None:
+            return cached_state
         
-        return state.state if state else None
+        design_state = DesignState.get_by_id(state_id).state
+        _cache_latest_state(session_id, state_id, design_state)
+        return design_state
     except Exception:
         return None
 
+def get_latest_design_states(session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the latest design state for several sessions at once.
+    
+    Each returned dictionary is the caller's own copy. Unlike get_latest_design_state,
+    database errors are raised rather than treated as missing states.
+    
+    Args:
+        session_ids: The IDs of the sessions.
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: The latest design state for each session that has one.
+    """
+    return {session_id: state for session_id, (_, state) in get_latest_design_states_with_ids(session_ids).items()}
+
+def get_latest_design_states_with_ids(session_ids: List[str]) -> Dict[str, Tuple[int, Dict[str, Any]]]:
+    """
+    Get the latest design state for several sessions at once, with its DesignState row ID.
+    
+    The latest row IDs are read for all sessions together, and only the states that
+    aren't cached are then loaded, also together. Each returned dictionary is the
+    caller's own copy. Database errors are raised rather than treated as missing states.
+    
+    Args:
+        session_ids: The IDs of the sessions.
+        
+    Returns:
+        Dict[str, Tuple[int, Dict[str, Any]]]: The row ID and latest design state for each
+        session that has one. The ID only changes when a new state is saved.
+    """
+    design_states = {}
+    
+    # Keep each IN clause well under SQLite's bound parameter limit
+    for start in range(0, len(session_ids), _STATE_LOOKUP_BATCH_SIZE):
+        batch = session_ids[start:start + _STATE_LOOKUP_BATCH_SIZE]
+        # SQLite takes the bare columns of a MAX() aggregate from the row holding
+        # the maximum, so this returns each session's latest state ID
+        latest_ids = (DesignState
+                     .select(DesignState.session, DesignState.id, fn.MAX(DesignState.created_at))
+                     .where(DesignState.session.in_(batch))
+                     .group_by(DesignState.session)
+                     .tuples())
+        
+        missing = {}
+        for session_id, state_id, _ in latest_ids:
+            cached_state = _cached_latest_state(session_id, state_id)
+            if cached_state is not None:
+                design_states[session_id] = (state_id, cached_state)
+            else:
+                missing[state_id] = session_id
+        
+        if missing:
+            for state in DesignState.select().where(DesignState.id.in_(list(missing))):
+                session_id = missing[state.id]
+                design_states[session_id] = (state.id, state.state)
+                _cache_latest_state(session_id, state.id, design_states[session_id][1])
+    
+    return design_states
+
 def get_latest_instructions(session_id: str) -> Optional[str]:
     """
     Get the latest voice agent instructions for a session.
@@ -91,13 +232,9 @@ def get_latest_instructions(session_id: str) -> Optional[str]:
         Optional[str]: The latest instructions if found, None otherwise.
     """
     try:
-        session = get_session(session_id)
-        if not session:
-            return None
-        
         state = (DesignState
                 .select()
-                .where(DesignState.session == session)
+                .where(DesignState.session == session_id)
                 .order_by(DesignState.created_at.desc())
                 .first())
         
@@ -105,27 +242,107 @@ def get_latest_instructions(session_id: str) -> Optional[str]:
     except Exception:
         return None
 
-def add_conversation_message(session_id: str, speaker: str, message: str) -> Conversation:
+def _write_conversation_batch(batch: List[Dict[str, Any]]) -> None:
+    """
+    Insert a batch of queued conversation messages in a single transaction.
+    
+    Args:
+        batch: Row dictionaries for the Conversation table.
+    """
+    # The writer thread keeps its connection open between batches
+    try:
+        with db.atomic():
+            Conversation.insert_many(batch).execute()
+    except Exception as e:
+        print(f"Error writing conversation batch: {e}")
+        # Fall back to row-by-row inserts so one bad message doesn't drop the rest
+        for row in batch:
+            try:
+                Conversation.insert(row).execute()
+            except Exception as e:
+                print(f"Error writing conversation message: {e}")
+
+def _conversation_writer() -> None:
+    """Drain the conversation queue forever, writing messages in batches."""
+    while True:
+        batch = [_conversation_queue.get()]
+        deadline = time.monotonic() + _CONVERSATION_BATCH_WINDOW
+        
+        # Collect whatever else arrives within the batch window
+        while len(batch) < _CONVERSATION_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_conversation_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            _write_conversation_batch(batch)
+        finally:
+            with _pending_condition:
+                for row in batch:
+                    remaining = _pending_messages[row['session']] - 1
+                    if remaining:
+                        _pending_messages[row['session']] = remaining
+                    else:
+                        del _pending_messages[row['session']]
+                _pending_condition.notify_all()
+            
+            for _ in batch:
+                _conversation_queue.task_done()
+
+def _ensure_conversation_writer() -> None:
+    """Start the background conversation writer if it isn't running yet."""
+    global _writer_thread
+    
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_conversation_writer, daemon=True)
+            _writer_thread.start()
+            atexit.register(flush_conversations)
+
+def add_conversation_message(session_id: str, speaker: str, message: str) -> None:
     """
     Add a message to the conversation history.
     
+    The message is queued and written by a background thread. Use
+    flush_conversations() to wait until queued messages are stored.
+    
     Args:
         session_id: The ID of the session.
         speaker: Who said the message ('user' or 'agent').
         message: The content of the message.
-        
-    Returns:
-        Conversation: The newly created conversation message.
     """
-    session = get_session(session_id)
-    if not session:
-        raise ValueError(f"Session with ID {session_id} does not exist")
+    _ensure_conversation_writer()
+    
+    # Count the message before queueing it so the writer can't finish it first
+    with _pending_condition:
+        _pending_messages[session_id] = _pending_messages.get(session_id, 0) + 1
+    
+    # Timestamp now so the history keeps the order messages were added in
+    _conversation_queue.put({
+        'session': session_id,
+        'speaker': speaker,
+        'message': message,
+        'timestamp': datetime.now()
+    })
+
+def flush_conversations(session_id: Optional[str] = None) -> None:
+    """
+    Block until queued conversation messages have been written.
+    
+    Args:
+        session_id: Only wait for this session's messages. Waits for every
+                    queued message if not provided.
+    """
+    if session_id is None:
+        _conversation_queue.join()
+        return
     
-    return Conversation.create(
-        session=session,
-        speaker=speaker,
-        message=message
-    )
+    with _pending_condition:
+        _pending_condition.wait_for(lambda: session_id not in _pending_messages)
 
 def get_conversation_history(session_id: str) -> List[Dict[str, Any]]:
     """
@@ -137,24 +354,60 @@ def get_conversation_history(session_id: str) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: The conversation history as a list of dictionaries.
     """
+    # Make sure this session's messages still waiting in the queue are included
+    flush_conversations(session_id)
+    
     try:
-        session = get_session(session_id)
-        if not session:
-            return []
-        
+        # Read plain dicts of only the needed columns rather than building model instances
         conversations = (Conversation
-                        .select()
-                        .where(Conversation.session == session)
-                        .order_by(Conversation.timestamp.asc()))
+                        .select(Conversation.speaker, Conversation.message, Conversation.timestamp)
+                        .where(Conversation.session == session_id)
+                        .order_by(Conversation.timestamp.asc())
+                        .dicts())
         
         return [{
-            'speaker': conv.speaker,
-            'message': conv.message,
-            'timestamp': conv.timestamp.isoformat()
+            'speaker': conv['speaker'],
+            'message': conv['message'],
+            'timestamp': conv['timestamp'].isoformat()
         } for conv in conversations]
     except Exception:
         return []
 
+def get_session_version(session_id: str) -> Tuple[int, int]:
+    """
+    Get a cheap version stamp for the data stored for a session.
+    
+    The stamp only changes when a message or design state is added, so it can be
+    used as a cache key instead of re-reading the full history or design state.
+    
+    Args:
+        session_id: The ID of the session.
+        
+    Returns:
+        Tuple[int, int]: The latest conversation message ID and design state ID (0 if none).
+    """
+    # Make sure this session's messages still waiting in the queue are counted
+    flush_conversations(session_id)
+    
+    try:
+        conversation_version = (Conversation
+                               .select(fn.MAX(Conversation.id))
+                               .where(Conversation.session == session_id))
+        
+        state_version = (DesignState
+                        .select(fn.MAX(DesignState.id))
+                        .where(DesignState.session == session_id))
+        
+        # Fetch both as scalar subqueries in a single statement
+        conversation_version, state_version = (Select(columns=[conversation_version, state_version])
+                                               .bind(db)
+                                               .tuples()
+                                               .get())
+        
+        return conversation_version or 0, state_version or 0
+    except Exception:
+        return 0, 0
+
 def setup_database():
     """Set up the database and create all necessary tables."""
     initialize_db()
\ No newline at end of file
@@ -1,22 +1,212 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import json
-import time
+import html
 import asyncio
+import itertools
 import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, Any, Optional
+from operator import itemgetter
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
 
 from paid.database import (
     setup_database,
     create_session,
+    get_session,
     get_latest_design_state,
-    get_conversation_history
+    get_conversation_history,
+    get_session_version
 )
-from paid.agents.visual_agents import UserFlowDiagramManager
-from paid.agents.anthropic_deepgram_agent import AnthropicDeepgramAgent
 from paid.frontend.export import generate_md_from_design_state
 
+# The agent modules pull in the Anthropic and Deepgram SDKs, so they are imported
+# where they are first used rather than before the first frame is rendered
+if TYPE_CHECKING:
+    from paid.agents.anthropic_deepgram_agent import AnthropicDeepgramAgent
+
+# Chat message role for each speaker stored in the conversation history
+CHAT_ROLES = {"user": "user", "agent": "assistant"}
+
+# Chat bubble for each chat role, used to render earlier turns as a single HTML block
+CHAT_BUBBLE_HTML = {
+    "user": "<div style='margin: 0 0 12px 20%; padding: 10px 14px; border-radius: 10px; background-color: #e7f2fb;'>{text}</div>",
+    "assistant": "<div style='margin: 0 20% 12px 0; padding: 10px 14px; border-radius: 10px; background-color: #f0f2f6;'>{text}</div>"
+}
+
+# PRD banner, carrying the styles for the PRD's other HTML blocks so they cost no extra element
+PRD_HEADER_HTML = """
+<style>
+.paid-title { text-align: center; margin-bottom: 20px; }
+.paid-problem { background-color: #e7f2fb; padding: 15px; border-radius: 5px; }
+.paid-one-liner { background-color: #f2f0e7; padding: 15px; border-radius: 5px; font-weight: bold; font-size: 18px; text-align: center; }
+</style>
+<div style='background-color: #f0f2f6; padding: 20px; border-radius: 10px; margin-bottom: 20px;'>
+    <h1 style='text-align: center; color: #262730;'>Product Requirements Document</h1>
+    <p style='text-align: center; color: #555;'>Auto-generated based on your conversation</p>
+</div>
+"""
+PRD_TITLE_HTML = "<h2 class='paid-title'>{}</h2>"
+PROBLEM_STATEMENT_HTML = "<div class='paid-problem'>{}</div>"
+ONE_LINER_HTML = "<div class='paid-one-liner'>{}</div>"
+LAST_UPDATE_HTML = "<div style='text-align: right; color: #888;'><small>Auto-updating PRD in real-time as you talk | Last update: {}</small></div>"
+
+# Polling is done with fragment run_every timers, which the browser drives and which only
+# exist for the fragments on the selected tab, so the hidden tab never re-runs.
+# How often the conversation history checks for new messages during a voice session
+CONVERSATION_POLL_SECONDS = 1
+
+# How often the PRD and progress panels check for a new design state during a voice session
+DESIGN_POLL_SECONDS = 3
+
+# How long to wait for a coroutine on the background loop, including a voice session start
+BACKGROUND_TIMEOUT_SECONDS = 10
+
+# Mermaid ES module loaded inside each diagram iframe
+MERMAID_MODULE_URL = 'https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.esm.min.mjs'
+
+
+@st.cache_resource(show_spinner=False)
+def initialize_database() -> bool:
+    """
+    Create the tables and run any migrations, once per server process.
+    
+    Returns:
+        bool: Always True; cache_resource needs a value to cache.
+    """
+    setup_database()
+    return True
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_design_state(session_id: str, version: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the latest design state, cached until the session's design state version changes.
+    
+    Args:
+        session_id: The database session ID
+        version: The design state version from get_session_version
+        
+    Returns:
+        Optional[Dict[str, Any]]: The latest design state if found, None otherwise.
+    """
+    return get_latest_design_state(session_id)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_conversation_history(session_id: str, version: int) -> List[Dict[str, Any]]:
+    """
+    Get the conversation history, cached until the session's conversation version changes.
+    
+    Args:
+        session_id: The database session ID
+        version: The conversation version from get_session_version
+        
+    Returns:
+        List[Dict[str, Any]]: The conversation history.
+    """
+    return get_conversation_history(session_id)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_prd_markdown(session_id: str, version: int, _design_state: Dict[str, Any]) -> str:
+    """
+    Generate the downloadable PRD markdown, cached until the design state version changes.
+    
+    Args:
+        session_id: The database session ID
+        version: The design state version from get_session_version
+        _design_state: The design state for that version; not hashed, since the version identifies it
+        
+    Returns:
+        str: The PRD as markdown.
+    """
+    return generate_md_from_design_state(_design_state)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_conversation_html(session_id: str, version: int, _turns: List[Tuple[str, str]]) -> str:
+    """
+    Render conversation turns as chat bubbles in one HTML string.
+    
+    Args:
+        session_id: The database session ID
+        version: The conversation version from get_session_version
+        _turns: (chat role, text) pairs for that version; not hashed, since the version identifies them
+        
+    Returns:
+        str: The HTML for all the turns.
+    """
+    return "".join(
+        CHAT_BUBBLE_HTML[role].format(text=html.escape(text).replace("\n", "<br>"))
+        for role, text in _turns
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the event loop that runs the voice agents, starting it on first use.
+    
+    The loop lives on a daemon thread for the lifetime of the process, so the
+    agents stay bound to one loop across reruns instead of a new one per click.
+    
+    Returns:
+        asyncio.AbstractEventLoop: The persistent background event loop.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="voice-agent-loop", daemon=True).start()
+    return loop
+
+
+def submit_to_background_loop(coro) -> Future:
+    """
+    Schedule a coroutine on the background event loop without waiting for it.
+    
+    Args:
+        coro: The coroutine to run
+        
+    Returns:
+        Future: A future that resolves to the coroutine's result.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+
+
+def run_in_background_loop(coro, timeout: float = BACKGROUND_TIMEOUT_SECONDS):
+    """
+    Run a coroutine on the background event loop and wait for its result.
+    
+    Args:
+        coro: The coroutine to run
+        timeout: Maximum number of seconds to wait for the result
+        
+    Returns:
+        The coroutine's result.
+    """
+    return submit_to_background_loop(coro).result(timeout=timeout)
+
+
+def get_voice_agent(session_id: str, is_resuming: bool = False) -> "AnthropicDeepgramAgent":
+    """
+    Create the integrated voice agent for a session.
+    
+    The caller keeps the agent in st.session_state only, so each browser tab has its
+    own agent and Deepgram connection, and the agent is released when its voice
+    session is stopped or fails to start, or when the tab's session ends.
+    
+    Args:
+        session_id: The database session ID
+        is_resuming: Whether this is resuming a previous session
+        
+    Returns:
+        AnthropicDeepgramAgent: The agent for this session.
+    """
+    from paid.agents.anthropic_deepgram_agent import AnthropicDeepgramAgent
+    
+    return AnthropicDeepgramAgent(session_id=session_id, is_resuming=is_resuming)
+
 
 def initialize_session(existing_session_id: str = None) -> str:
     """
@@ -31,7 +221,6 @@ def initialize_session(existing_session_id: str = None) -> str:
     # If an existing session ID is provided, use it
     if existing_session_id:
         # Check if the session exists
-        from paid.database import get_session
         if get_session(existing_session_id):
             st.session_state.session_id = existing_session_id
             st.session_state.is_resumed_session = True
@@ -39,7 +228,8 @@ def initialize_session(existing_session_id: str = None) -> str:
         else:
             st.error(f"Session with ID {existing_session_id} not found. Creating a new session.")
     
-    # Otherwise, create a new session or use the existing one
+    # Otherwise, create a new session or use the existing one. This stays a membership
+    # check rather than setdefault so create_session only runs on the first run.
     if "session_id" not in st.session_state:
         st.session_state.session_id = create_session()
         st.session_state.is_resumed_session = False
@@ -47,8 +237,20 @@ def initialize_session(existing_session_id: str = None) -> str:
     return st.session_state.session_id
 
 
-def render_mermaid(diagram_code: str) -> None:
-    """Render a Mermaid diagram in Streamlit using HTML components."""
+@st.cache_data(show_spinner=False, max_entries=128)
+def build_mermaid_html(diagram_code: str) -> str:
+    """
+    Build the iframe document for a Mermaid diagram.
+    
+    The output is identical for identical diagram code, so Streamlit keeps the existing
+    iframe on reruns instead of reloading it and re-running Mermaid in the browser.
+    
+    Args:
+        diagram_code: The Mermaid diagram source.
+        
+    Returns:
+        str: The HTML to pass to components.html.
+    """
     # Clean up any extra whitespace
     clean_code = diagram_code.strip()
     
@@ -62,42 +264,95 @@ def render_mermaid(diagram_code: str) -> None:
         if not clean_code.startswith('flowchart') and not clean_code.startswith('graph'):
             clean_code = 'graph LR\n' + clean_code
     
+    # Mermaid reads the element's text content, so the code is escaped rather than
+    # injected as markup
+    return f"""
+        <pre class="mermaid">
+            {html.escape(clean_code)}
+        </pre>
+
+        <script type="module">
+            import mermaid from '{MERMAID_MODULE_URL}';
+            mermaid.initialize({{ startOnLoad: true }});
+        </script>
+        """
+
+
+def render_mermaid(diagram_code: str) -> None:
+    """Render a Mermaid diagram in Streamlit using HTML components."""
     # Render the diagram using HTML component
     try:
         components.html(
-            f"""
-            <pre class="mermaid">
-                {clean_code}
-            </pre>
-
-            <script type="module">
-                import mermaid from 'https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.esm.min.mjs';
-                mermaid.initialize({{ startOnLoad: true }});
-            </script>
-            """,
+            build_mermaid_html(diagram_code),
             height=300  # Adjust height as needed
         )
     except Exception as e:
         print(f"Error rendering mermaid diagram: {str(e)}")
         # Fallback to showing the code
-        st.code(clean_code, language=None)
+        st.code(diagram_code.strip(), language=None)
+
+
+def render_conversation_history(session_id: str) -> None:
+    """
+    Display the conversation messages for a session.
+    
+    Only re-reads the history when a new message has been stored.
+    
+    Args:
+        session_id: The database session ID
+    """
+    # Check the version on every run, since the fragment re-runs on its own
+    conversation_version, _ = get_session_version(session_id)
+    conversation = load_conversation_history(session_id, conversation_version)
+    
+    # Consecutive messages from the same speaker share one chat bubble
+    turns = [
+        (CHAT_ROLES.get(speaker, "assistant"), "\n\n".join(message["message"] for message in messages))
+        for speaker, messages in itertools.groupby(conversation, key=itemgetter("speaker"))
+    ]
+    if not turns:
+        return
+    
+    # Earlier turns are a single HTML element; only the latest turn gets its own chat message
+    if len(turns) > 1:
+        st.markdown(build_conversation_html(session_id, conversation_version, turns[:-1]), unsafe_allow_html=True)
+    
+    role, text = turns[-1]
+    with st.chat_message(role):
+        st.markdown(text)
 
 
-def display_conversation(session_id: str) -> None:
-    """Display the conversation history in the UI."""
-    conversation = get_conversation_history(session_id)
+def display_conversation_history(session_id: str) -> None:
+    """
+    Display the conversation history as a fragment.
     
-    st.subheader("Conversation")
+    While a voice session is active the fragment re-runs on its own every
+    CONVERSATION_POLL_SECONDS so new transcripts appear without re-running the whole page.
+    
+    Args:
+        session_id: The database session ID
+    """
+    run_every = CONVERSATION_POLL_SECONDS if st.session_state.voice_active else None
+    st.fragment(render_conversation_history, run_every=run_every)(session_id)
+
+
+def render_bullets(items: List[Any]) -> None:
+    """
+    Display items as a bullet list in a single markdown element.
     
-    for message in conversation:
-        with st.chat_message("user" if message["speaker"] == "user" else "assistant"):
-            st.write(message["message"])
+    Args:
+        items: The items to list.
+    """
+    st.markdown("\n".join(f"- {item}" for item in items))
 
 
-def display_design_state(session_id: str) -> None:
-    """Display the current design state in the UI as a visual PRD."""
-    design_state = get_latest_design_state(session_id)
+def display_design_state(design_state: Optional[Dict[str, Any]]) -> None:
+    """
+    Display the current design state in the UI as a visual PRD.
     
+    Args:
+        design_state: The latest design state, as already loaded by the caller.
+    """
     if not design_state:
         st.info("No design information yet. Start talking to build your design!")
         return
@@ -107,25 +362,23 @@ def display_design_state(session_id: str) -> None:
         paid_data = design_state["Paid"]
         
         # Add a visual header for the PRD
-        st.markdown("""
-        <div style='background-color: #f0f2f6; padding: 20px; border-radius: 10px; margin-bottom: 20px;'>
-            <h1 style='text-align: center; color: #262730;'>Product Requirements Document</h1>
-            <p style='text-align: center; color: #555;'>Auto-generated based on your conversation</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(PRD_HEADER_HTML, unsafe_allow_html=True)
         
         # Meta information and title
         if "meta" in paid_data:
             meta = paid_data["meta"]
-            if meta.get("title"):
-                st.markdown(f"<h2 style='text-align: center; margin-bottom: 20px;'>{meta['title']}</h2>", unsafe_allow_html=True)
+            title = meta.get("title")
+            if title:
+                st.markdown(PRD_TITLE_HTML.format(title), unsafe_allow_html=True)
             
-            if meta.get("createdAt") or meta.get("updatedAt"):
+            created_at = meta.get("createdAt")
+            updated_at = meta.get("updatedAt")
+            if created_at or updated_at:
                 col1, col2 = st.columns(2)
-                if meta.get("createdAt"):
-                    col1.markdown(f"**Created:** {meta['createdAt']}")
-                if meta.get("updatedAt"):
-                    col2.markdown(f"**Last Updated:** {meta['updatedAt']}")
+                if created_at:
+                    col1.markdown(f"**Created:** {created_at}")
+                if updated_at:
+                    col2.markdown(f"**Last Updated:** {updated_at}")
                 st.divider()
         
         # Problem Statement Section
@@ -133,55 +386,60 @@ def display_design_state(session_id: str) -> None:
             problem = paid_data["problem"]
             
             st.markdown("## 📌 Problem Statement")
-            if problem.get("statement"):
-                st.markdown(f"<div style='background-color: #e7f2fb; padding: 15px; border-radius: 5px;'>{problem['statement']}</div>", unsafe_allow_html=True)
+            statement = problem.get("statement")
+            if statement:
+                st.markdown(PROBLEM_STATEMENT_HTML.format(statement), unsafe_allow_html=True)
             
             # Current Solutions
-            if problem.get("currentSolutions"):
+            current_solutions = problem.get("currentSolutions")
+            if current_solutions:
                 st.markdown("### Current Solutions")
-                st.markdown(problem["currentSolutions"])
+                st.markdown(current_solutions)
             
             # Pain Points
-            if problem.get("painPoints") and len(problem["painPoints"]) > 0:
+            pain_points = problem.get("painPoints")
+            if pain_points:
                 st.markdown("### Pain Points")
-                for point in problem["painPoints"]:
-                    st.markdown(f"- {point}")
+                render_bullets(pain_points)
             
             st.divider()
         
         # User Personas Section
-        if "users" in paid_data and "personas" in paid_data["users"] and len(paid_data["users"]["personas"]) > 0:
+        personas = (paid_data.get("users") or {}).get("personas")
+        if personas:
             st.markdown("## 👥 User Personas")
             
-            personas = paid_data["users"]["personas"]
             for persona in personas:
-                if persona.get("name"):
-                    with st.expander(f"Persona: {persona['name']}", expanded=True):
+                name = persona.get("name")
+                if name:
+                    with st.expander(f"Persona: {name}", expanded=True):
                         cols = st.columns(2)
                         
                         # Left column for demographics
                         with cols[0]:
-                            if persona.get("demographics"):
+                            demographics = persona.get("demographics")
+                            if demographics:
                                 st.markdown("### Demographics")
-                                st.markdown(persona["demographics"])
+                                st.markdown(demographics)
                         
                         # Right column for behaviors
                         with cols[1]:
-                            if persona.get("behaviors"):
+                            behaviors = persona.get("behaviors")
+                            if behaviors:
                                 st.markdown("### Behaviors")
-                                st.markdown(persona["behaviors"])
+                                st.markdown(behaviors)
                         
                         # Jobs to be done
-                        if persona.get("jobsToBeDone") and len(persona["jobsToBeDone"]) > 0:
+                        jobs = persona.get("jobsToBeDone")
+                        if jobs:
                             st.markdown("### Jobs to be Done")
-                            for job in persona["jobsToBeDone"]:
-                                st.markdown(f"- {job}")
+                            render_bullets(jobs)
                         
                         # Frustrations
-                        if persona.get("frustrations") and len(persona["frustrations"]) > 0:
+                        frustrations = persona.get("frustrations")
+                        if frustrations:
                             st.markdown("### Frustrations")
-                            for frustration in persona["frustrations"]:
-                                st.markdown(f"- {frustration}")
+                            render_bullets(frustrations)
             
             st.divider()
         
@@ -191,17 +449,19 @@ def display_design_state(session_id: str) -> None:
             
             st.markdown("## 💡 Value Proposition")
             
-            if vp.get("oneLiner"):
-                st.markdown(f"<div style='background-color: #f2f0e7; padding: 15px; border-radius: 5px; font-weight: bold; font-size: 18px; text-align: center;'>{vp['oneLiner']}</div>", unsafe_allow_html=True)
+            one_liner = vp.get("oneLiner")
+            if one_liner:
+                st.markdown(ONE_LINER_HTML.format(one_liner), unsafe_allow_html=True)
             
-            if vp.get("primaryBenefit"):
+            primary_benefit = vp.get("primaryBenefit")
+            if primary_benefit:
                 st.markdown("### Primary Benefit")
-                st.markdown(vp["primaryBenefit"])
+                st.markdown(primary_benefit)
             
-            if vp.get("uniqueDifferentiators") and len(vp["uniqueDifferentiators"]) > 0:
+            differentiators = vp.get("uniqueDifferentiators")
+            if differentiators:
                 st.markdown("### Unique Differentiators")
-                for diff in vp["uniqueDifferentiators"]:
-                    st.markdown(f"- {diff}")
+                render_bullets(differentiators)
             
             st.divider()
         
@@ -211,21 +471,22 @@ def display_design_state(session_id: str) -> None:
             
             st.markdown("## 🛠️ Approach")
             
-            if approach.get("coreConcept"):
+            core_concept = approach.get("coreConcept")
+            if core_concept:
                 st.markdown("### Core Concept")
-                st.markdown(approach["coreConcept"])
+                st.markdown(core_concept)
             
             # MVP Features with progress indicators
-            if approach.get("mvpFeatures") and len(approach["mvpFeatures"]) > 0:
+            mvp_features = approach.get("mvpFeatures")
+            if mvp_features:
                 st.markdown("### MVP Features")
-                for i, feature in enumerate(approach["mvpFeatures"]):
-                    st.markdown(f"- {feature}")
+                render_bullets(mvp_features)
             
             # Technical Considerations
-            if approach.get("technicalConsiderations") and len(approach["technicalConsiderations"]) > 0:
+            technical_considerations = approach.get("technicalConsiderations")
+            if technical_considerations:
                 st.markdown("### Technical Considerations")
-                for tech in approach["technicalConsiderations"]:
-                    st.markdown(f"- {tech}")
+                render_bullets(technical_considerations)
             
             st.divider()
         
@@ -235,11 +496,13 @@ def display_design_state(session_id: str) -> None:
             
             st.markdown("## 🖥️ User Experience")
             
-            if ux.get("summary"):
-                st.markdown(ux["summary"])
+            summary = ux.get("summary")
+            if summary:
+                st.markdown(summary)
             
             # User Flows with Mermaid diagrams
-            if ux.get("userFlows") and len(ux["userFlows"]) > 0:
+            user_flows = ux.get("userFlows")
+            if user_flows:
                 st.markdown("### User Flows")
                 
                 # Initialize flow diagram manager if not in session state
@@ -247,23 +510,26 @@ def display_design_state(session_id: str) -> None:
                 #     st.session_state.flow_diagram_manager = UserFlowDiagramManager(session_id)
                 
                 # # Generate diagrams if user flows have changed
-                # flow_diagrams = st.session_state.flow_diagram_manager.generate_flow_diagrams(ux["userFlows"])
+                # flow_diagrams = st.session_state.flow_diagram_manager.generate_flow_diagrams(user_flows)
                 
                 # Display each user flow with its diagram if available
-                for i, flow in enumerate(ux["userFlows"]):
-                    if flow.get("flowName"):
-                        with st.expander(flow["flowName"], expanded=False):
-                            if flow.get("description"):
-                                st.markdown(flow["description"])
+                for i, flow in enumerate(user_flows):
+                    flow_name = flow.get("flowName")
+                    if flow_name:
+                        with st.expander(flow_name, expanded=False):
+                            description = flow.get("description")
+                            if description:
+                                st.markdown(description)
                             
                             # Display steps
-                            if flow.get("steps") and len(flow["steps"]) > 0:
+                            steps = flow.get("steps")
+                            if steps:
                                 st.markdown("#### Steps")
-                                for step in flow["steps"]:
-                                    if "step" in step and "name" in step:
-                                        st.markdown(f"**{step['step']}. {step['name']}**")
-                                        if "description" in step:
-                                            st.markdown(step["description"])
+                                st.markdown("\n\n".join(
+                                    f"**{step['step']}. {step['name']}**" + (f"\n\n{step['description']}" if "description" in step else "")
+                                    for step in steps
+                                    if "step" in step and "name" in step
+                                ))
                             
                             # Display the mermaid diagram if available
                             # if i in flow_diagrams:
@@ -288,8 +554,10 @@ def display_design_state(session_id: str) -> None:
         # Display user types
         if "users" in design_state and design_state["users"]:
             st.subheader("User Types")
-            for user in design_state["users"]:
-                st.markdown(f"- **{user.get('name', 'User')}**: {user.get('description', '')}")
+            st.markdown("\n".join(
+                f"- **{user.get('name', 'User')}**: {user.get('description', '')}"
+                for user in design_state["users"]
+            ))
         
         # Display requirements
         if "requirements" in design_state:
@@ -297,13 +565,11 @@ def display_design_state(session_id: str) -> None:
             
             if reqs.get("functional"):
                 st.subheader("Functional Requirements")
-                for req in reqs["functional"]:
-                    st.markdown(f"- {req}")
+                render_bullets(reqs["functional"])
             
             if reqs.get("non_functional"):
                 st.subheader("Non-Functional Requirements")
-                for req in reqs["non_functional"]:
-                    st.markdown(f"- {req}")
+                render_bullets(reqs["non_functional"])
         
         # Display features
         if "features" in design_state and design_state["features"]:
@@ -316,46 +582,223 @@ def display_design_state(session_id: str) -> None:
                         st.markdown(f"**Priority:** {feature['priority']}")
 
 
-async def start_live_voice_session(session_id: str, is_resuming: bool = False):
+def render_prd_panel(session_id: str) -> None:
+    """
+    Display the PRD with its update notice and download button.
+    
+    Args:
+        session_id: The database session ID
+    """
+    # Check the version on every run, since the fragment re-runs on its own
+    _, design_state_version = get_session_version(session_id)
+    design_state = load_design_state(session_id, design_state_version)
+    
+    # Check if the design state has changed; the version increases with every stored state
+    if design_state and design_state_version != st.session_state.last_design_state_version:
+        st.session_state.last_design_state_version = design_state_version
+        st.session_state.last_design_state_time = datetime.now().strftime("%I:%M:%S %p")
+        st.success("PRD updated with latest information from your conversation!")
+    
+    # Display the visual PRD
+    display_design_state(design_state)
+    
+    # Add a download button for the PRD
+    col_info, col_download = st.columns([3, 1])
+    
+    with col_info:
+        # Time the current version of the PRD was first shown, stamped once per version
+        st.markdown(LAST_UPDATE_HTML.format(st.session_state.get("last_design_state_time", "-")), unsafe_allow_html=True)
+    
+    with col_download:
+        if design_state and "Paid" in design_state:
+            # Create download button; the markdown is cached per design state version
+            st.download_button(
+                label="📥 Download PRD",
+                data=build_prd_markdown(session_id, design_state_version, design_state),
+                file_name="product_requirements_document.md",
+                mime="text/markdown",
+                help="Download the PRD as a Markdown file"
+            )
+
+
+def display_prd_panel(session_id: str) -> None:
+    """
+    Display the PRD panel as a fragment.
+    
+    While a voice session is active the fragment re-runs on its own every
+    DESIGN_POLL_SECONDS, so the PRD refreshes without re-running the whole page.
+    
+    Args:
+        session_id: The database session ID
+    """
+    run_every = DESIGN_POLL_SECONDS if st.session_state.voice_active else None
+    st.fragment(render_prd_panel, run_every=run_every)(session_id)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_design_progress(session_id: str, version: int, _paid_data: Dict[str, Any]) -> Tuple[List[Tuple[str, bool]], int]:
+    """
+    Work out which major PRD sections are filled in, cached per design state version.
+    
+    Args:
+        session_id: The database session ID
+        version: The design state version from get_session_version
+        _paid_data: The "Paid" part of that design state; not hashed, since the version identifies it
+        
+    Returns:
+        Tuple[List[Tuple[str, bool]], int]: Each section with whether it is complete, and the overall completion percentage.
+    """
+    problem, users, vp, approach, ux = (
+        _paid_data.get(key) or {}
+        for key in ("problem", "users", "valueProposition", "approach", "userExperience")
+    )
+    sections = [
+        ("Problem", bool(problem.get("statement"))),
+        ("Users", bool(users.get("personas"))),
+        ("Value Proposition", bool(vp.get("oneLiner"))),
+        ("Approach", bool(approach.get("coreConcept"))),
+        ("User Experience", bool(ux.get("summary")))
+    ]
+    completed_sections = sum(completed for _, completed in sections)
+    return sections, int(completed_sections / len(sections) * 100)
+
+
+def render_design_progress(session_id: str) -> None:
+    """
+    Display a condensed view of how complete each PRD section is.
+    
+    Args:
+        session_id: The database session ID
+    """
+    _, design_state_version = get_session_version(session_id)
+    design_state = load_design_state(session_id, design_state_version)
+    
+    if design_state and "Paid" in design_state:
+        sections, completion_percentage = get_design_progress(session_id, design_state_version, design_state["Paid"])
+        
+        # Show a progress tracker for each major section
+        st.markdown("  \n".join(f"{'✅' if completed else '🔄'} **{section}**" for section, completed in sections))
+        
+        st.progress(completion_percentage / 100)
+        st.markdown(f"**Overall Progress**: {completion_percentage}%")
+    else:
+        st.info("Start your design conversation to see progress.")
+
+
+def display_design_progress(session_id: str) -> None:
+    """
+    Display the design progress as a fragment, polling while a voice session is active.
+    
+    Args:
+        session_id: The database session ID
+    """
+    run_every = DESIGN_POLL_SECONDS if st.session_state.voice_active else None
+    st.fragment(render_design_progress, run_every=run_every)(session_id)
+
+
+def start_live_voice_session(session_id: str, is_resuming: bool = False):
     """
     Start a live voice conversation session.
     
+    The agent connects on the background loop; display_voice_start_status picks up
+    the outcome so the script doesn't block on the Deepgram handshake.
+    
     Args:
         session_id: The database session ID
         is_resuming: Whether this is resuming a previous session
     """
+    # A second click while the first start is still connecting would start another agent
+    if st.session_state.get("voice_start_future") is not None:
+        return "Voice session is already starting..."
+    
     try:
-        # Initialize the integrated agent with resuming flag
-        agent = AnthropicDeepgramAgent(
-            session_id=session_id, 
-            is_resuming=is_resuming
-        )
+        # Create the integrated agent for this browser session
+        agent = get_voice_agent(session_id, is_resuming)
         
         # Store the agent in session state
         st.session_state.voice_agent = agent
+        st.session_state.voice_resuming = is_resuming
         
         # Start the agent - welcome message will be handled by the agent based on resuming flag
-        success = await agent.start()
-        
-        if success:
-            st.session_state.voice_active = True
-            return "Voice session started successfully" + (" (Resumed)" if is_resuming else "")
-        else:
-            return "Failed to start voice session"
+        st.session_state.voice_start_future = submit_to_background_loop(agent.start())
+        st.session_state.voice_start_deadline = time.monotonic() + BACKGROUND_TIMEOUT_SECONDS
+        return "Starting voice session..."
     except Exception as e:
         return f"Error starting voice session: {str(e)}"
 
-async def stop_live_voice_session():
+
+@st.fragment(run_every=CONVERSATION_POLL_SECONDS)
+def display_voice_start_status() -> None:
+    """Show a pending voice session start and re-run the page once it has finished or timed out."""
+    future = st.session_state.voice_start_future
+    if future is None:
+        return
+    
+    if not future.done():
+        if time.monotonic() < st.session_state.voice_start_deadline:
+            st.info("Starting voice session...")
+            return
+        
+        # Give up on a start that hangs, e.g. on the Deepgram handshake, so the controls come back
+        future.cancel()
+        st.session_state.voice_start_future = None
+        st.session_state.voice_agent = None
+        st.session_state.voice_status_message = f"Failed to start voice session: timed out after {BACKGROUND_TIMEOUT_SECONDS} seconds"
+        st.rerun()
+    
+    st.session_state.voice_start_future = None
+    try:
+        success = future.result()
+    except Exception as e:
+        success = False
+        print(f"Error starting voice session: {e}")
+    
+    if success:
+        st.session_state.voice_active = True
+        st.session_state.voice_status_message = "Voice session started successfully" + (" (Resumed)" if st.session_state.voice_resuming else "")
+    else:
+        # Don't reuse an agent whose start failed
+        st.session_state.voice_agent = None
+        st.session_state.voice_status_message = "Failed to start voice session"
+    
+    # Re-run the whole page so the controls and conversation polling pick up the new state
+    st.rerun()
+
+
+def stop_live_voice_session():
     """Stop the live voice conversation session."""
     try:
         if hasattr(st.session_state, 'voice_agent') and st.session_state.voice_agent:
-            await st.session_state.voice_agent.stop()
+            agent = st.session_state.voice_agent
+            run_in_background_loop(agent.stop())
             st.session_state.voice_active = False
+            
+            # Release the agent and its API clients; starting again creates a fresh one
+            st.session_state.voice_agent = None
             return "Voice session stopped"
         return "No active voice session to stop"
     except Exception as e:
         return f"Error stopping voice session: {str(e)}"
 
+# Button callbacks run before the page script, so the page they trigger already reflects
+# the new state and doesn't need a second st.rerun()
+def handle_start_voice_click(session_id: str, is_resuming: bool) -> None:
+    """Start the voice session, keeping any error to show on the next run."""
+    result = start_live_voice_session(session_id, is_resuming)
+    if st.session_state.voice_start_future is None:
+        st.session_state.voice_status_message = result
+
+
+def handle_stop_voice_click() -> None:
+    """Stop the voice session, keeping the outcome to show on the next run."""
+    st.session_state.voice_status_message = stop_live_voice_session()
+
+
+def show_prd_tab() -> None:
+    """Switch to the PRD tab."""
+    st.session_state.active_tab = 0
+
+
 # Text input to the voice agent is not currently supported
 # This functionality has been removed as the Deepgram agent only works with microphone input
 
@@ -373,26 +816,21 @@ def main(session_id_to_resume: str = None):
     )
     
     # Initialize database
-    setup_database()
+    initialize_database()
     
     # Initialize or get session (resuming if a session ID is provided)
     session_id = initialize_session(session_id_to_resume)
     
     # Initialize session state
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    
-    if "voice_active" not in st.session_state:
-        st.session_state.voice_active = False
+    st.session_state.setdefault("messages", [])
+    st.session_state.setdefault("voice_active", False)
+    st.session_state.setdefault("voice_start_future", None)
     
-    # Initialize last refresh timestamp if not present
-    if "last_refresh" not in st.session_state:
-        st.session_state.last_refresh = time.time()
-        st.session_state.last_design_state_hash = None
+    # Design state version the "PRD updated" notice was last shown for
+    st.session_state.setdefault("last_design_state_version", None)
     
     # Initialize active tab if not present (0 = PRD, 1 = Conversation)
-    if "active_tab" not in st.session_state:
-        st.session_state.active_tab = 0
+    st.session_state.setdefault("active_tab", 0)
     
     # Create a container for the header
     header_container = st.container()
@@ -418,56 +856,11 @@ def main(session_id_to_resume: str = None):
                 # PRD View
                 col_prd, col_refresh = st.columns([9, 1])
                 with col_refresh:
-                    if st.button("🔄", help="Refresh PRD"):
-                        st.session_state.last_refresh = time.time()
-                        st.rerun()
-                
-                # Display the PRD
-                design_state = get_latest_design_state(session_id)
-                
-                # Check if the design state has changed
-                import hashlib
-                current_hash = None
-                if design_state:
-                    current_hash = hashlib.md5(json.dumps(design_state, sort_keys=True).encode()).hexdigest()
-                    
-                    if current_hash != st.session_state.last_design_state_hash:
-                        st.session_state.last_design_state_hash = current_hash
-                        st.success("PRD updated with latest information from your conversation!")
+                    # Clicking already re-runs the page, which re-reads the PRD
+                    st.button("🔄", help="Refresh PRD")
                 
-                # Display the visual PRD
-                display_design_state(session_id)
-                
-                # Add a download button for the PRD
-                col_info, col_download = st.columns([3, 1])
-                
-                with col_info:
-                    # Auto-refresh setup with timestamp
-                    current_time = datetime.now().strftime("%I:%M:%S %p")
-                    st.markdown(f"""
-                    <div style='text-align: right; color: #888;'>
-                        <small>Auto-updating PRD in real-time as you talk | Last update: {current_time}</small>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col_download:
-                    # Generate markdown for download
-                    if design_state and "Paid" in design_state:
-                        md_content = generate_md_from_design_state(design_state)
-                        
-                        # Create download button
-                        st.download_button(
-                            label="📥 Download PRD",
-                            data=md_content,
-                            file_name="product_requirements_document.md",
-                            mime="text/markdown",
-                            help="Download the PRD as a Markdown file"
-                        )
-                
-                # Auto-refresh the PRD every 5 seconds if a voice session is active
-                if st.session_state.voice_active and (time.time() - st.session_state.last_refresh) > 5:
-                    st.session_state.last_refresh = time.time()
-                    st.rerun()
+                # Display the PRD, polling for new design states while voice is active
+                display_prd_panel(session_id)
         else:
             # Show Conversation tab
             with conversation_container:
@@ -490,87 +883,45 @@ def main(session_id_to_resume: str = None):
                         col_start, col_stop = st.columns(2)
                         
                         with col_start:
-                            if not st.session_state.voice_active:
+                            if not st.session_state.voice_active and st.session_state.voice_start_future is None:
                                 # Check if we're resuming an existing session
                                 is_resuming = hasattr(st.session_state, 'is_resumed_session') and st.session_state.is_resumed_session
                                 
                                 button_label = "Resume Voice Session" if is_resuming else "Start Voice Session"
-                                if st.button(button_label, key="start_voice"):
-                                    # Run the async function
-                                    result = asyncio.run(start_live_voice_session(
-                                        session_id=session_id,
-                                        is_resuming=is_resuming
-                                    ))
-                                    st.info(result)
-                                    st.rerun()
+                                st.button(button_label, key="start_voice", on_click=handle_start_voice_click, args=(session_id, is_resuming))
                         
                         with col_stop:
                             if st.session_state.voice_active:
-                                if st.button("Stop Voice Session", key="stop_voice"):
-                                    # Run the async function
-                                    result = asyncio.run(stop_live_voice_session())
-                                    st.info(result)
-                                    st.rerun()
+                                st.button("Stop Voice Session", key="stop_voice", on_click=handle_stop_voice_click)
                         
                         # Display current status
-                        if st.session_state.voice_active:
+                        status_message = st.session_state.pop("voice_status_message", None)
+                        if status_message and status_message.startswith(("Error", "Failed")):
+                            st.error(status_message)
+                        elif status_message:
+                            st.info(status_message)
+                        
+                        if st.session_state.voice_start_future is not None:
+                            display_voice_start_status()
+                        elif st.session_state.voice_active:
                             st.success("Voice session is active. Speak into your microphone.")
-                            
-                            # Add a placeholder for conversation history that will auto-update
-                            conv_placeholder = st.empty()
-                            
-                            # Set up periodic auto-refresh
-                            if (time.time() - st.session_state.last_refresh) > 3:  # Refresh every 3 seconds during active session
-                                st.session_state.last_refresh = time.time()
-                                st.rerun()
                         else:
                             st.warning("Voice session is not active. Click 'Start Voice Session' to begin.")
                     
-                    # Display the conversation history
-                    conversation = get_conversation_history(session_id)
-                    for message in conversation:
-                        with st.chat_message("user" if message["speaker"] == "user" else "assistant"):
-                            st.write(message["message"])
+                    # Display the conversation history, polling for new messages while voice is active
+                    display_conversation_history(session_id)
                 
                 with col2:
                     # Show a condensed view of the current design state
                     st.subheader("Current Design Progress")
-                    design_state = get_latest_design_state(session_id)
-                    
-                    if design_state and "Paid" in design_state:
-                        paid_data = design_state["Paid"]
-                        
-                        # Create a progress tracker for each major section
-                        sections = [
-                            ("Problem", bool(paid_data.get("problem", {}).get("statement"))),
-                            ("Users", len(paid_data.get("users", {}).get("personas", [])) > 0),
-                            ("Value Proposition", bool(paid_data.get("valueProposition", {}).get("oneLiner"))),
-                            ("Approach", bool(paid_data.get("approach", {}).get("coreConcept"))),
-                            ("User Experience", bool(paid_data.get("userExperience", {}).get("summary")))
-                        ]
-                        
-                        for section, completed in sections:
-                            status = "✅" if completed else "🔄"
-                            st.markdown(f"{status} **{section}**")
-                        
-                        # Calculate and show overall completion percentage
-                        completed_sections = sum(1 for _, completed in sections if completed)
-                        completion_percentage = (completed_sections / len(sections)) * 100
-                        
-                        st.progress(completion_percentage / 100)
-                        st.markdown(f"**Overall Progress**: {int(completion_percentage)}%")
-                    else:
-                        st.info("Start your design conversation to see progress.")
+                    display_design_progress(session_id)
                     
                     # Add a button to view the full PRD
-                    if st.button("View Full PRD"):
-                        st.session_state.active_tab = 0  # Switch to PRD tab
-                        st.rerun()
+                    st.button("View Full PRD", on_click=show_prd_tab)
 
 
 if __name__ == "__main__":
     # Check for command-line arguments to support resuming a session
-    import sys
     session_id_arg = None
     
     if len(sys.argv) > 1:
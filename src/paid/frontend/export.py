@@ -5,10 +5,290 @@ This module provides functions to export the Product Requirements Document (PRD)
 as Markdown from the Paid data structure.
 """
 
+import io
 import os
+import re
 import json
+import queue
+import atexit
+import itertools
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from paid.database import get_latest_design_states_with_ids
+
+# Characters that aren't safe in an exported PRD's filename
+_FILENAME_SAFE = re.compile(r'[^\w\-_]')
+
+# Files written in parallel by export_prds_from_sessions
+_EXPORT_WORKERS = 8
+
+# Last exported Markdown per session, tagged with the DesignState row ID it was
+# generated from, so re-exporting an unchanged session skips the generation
+_PRD_CACHE_SIZE = 64
+_prd_cache: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+_prd_cache_lock = threading.Lock()
+
+
+# The current second and its formatted timestamp, replaced as one tuple so threads
+# never see a mismatched pair
+_now_cache: Tuple[int, str] = (0, "")
+
+
+def _now_str() -> str:
+    """
+    Get the current time formatted for the PRD, formatting at most once per second.
+    
+    Returns:
+        str: The current time as 'YYYY-MM-DD HH:MM:SS'.
+    """
+    global _now_cache
+    
+    now = int(time.time())
+    if _now_cache[0] != now:
+        _now_cache = (now, datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'))
+    return _now_cache[1]
+
+
+def _bullets(items: List[Any]) -> str:
+    """
+    Render items as a Markdown bullet list, one item per line.
+    
+    Args:
+        items: The non-empty list of items.
+        
+    Returns:
+        str: The bullet list, ending with a newline.
+    """
+    return "- " + "\n- ".join(map(str, items)) + "\n"
+
+
+def _personas(personas: List[Dict[str, Any]]) -> str:
+    """
+    Render the user personas, skipping any without a name.
+    
+    Args:
+        personas: The non-empty list of persona dictionaries.
+        
+    Returns:
+        str: The persona blocks, each ending with a blank line.
+    """
+    buf = io.StringIO()
+    write = buf.write
+    for persona in personas:
+        name = persona.get("name")
+        if not name:
+            continue
+        demographics = persona.get("demographics")
+        behaviors = persona.get("behaviors")
+        jobs = persona.get("jobsToBeDone")
+        frustrations = persona.get("frustrations")
+        
+        write(f"### Persona: {name}\n\n")
+        
+        if demographics:
+            write(f"#### Demographics\n\n{demographics}\n\n")
+        
+        if behaviors:
+            write(f"#### Behaviors\n\n{behaviors}\n\n")
+        
+        # Jobs to be done
+        if jobs:
+            write(f"#### Jobs to be Done\n\n{_bullets(jobs)}\n")
+        
+        # Frustrations
+        if frustrations:
+            write(f"#### Frustrations\n\n{_bullets(frustrations)}\n")
+    return buf.getvalue()
+
+
+def _user_flows(flows: List[Dict[str, Any]]) -> str:
+    """
+    Render the user flows and their numbered steps, skipping any flow without a name.
+    
+    Args:
+        flows: The non-empty list of user flow dictionaries.
+        
+    Returns:
+        str: The flow blocks, each ending with a blank line.
+    """
+    buf = io.StringIO()
+    write = buf.write
+    for flow in flows:
+        flow_name = flow.get("flowName")
+        if not flow_name:
+            continue
+        description = flow.get("description")
+        flow_steps = flow.get("steps")
+        
+        write(f"#### {flow_name}\n\n")
+        
+        if description:
+            write(f"{description}\n\n")
+        
+        if flow_steps:
+            steps = "".join(
+                f"{step['step']}. **{step['name']}**: {step['description']}\n" if "description" in step
+                else f"{step['step']}. **{step['name']}**\n"
+                for step in flow_steps
+                if "step" in step and "name" in step
+            )
+            write(f"**Steps:**\n\n{steps}\n")
+    return buf.getvalue()
+
+
+def _meta_template(has_title: bool, has_created: bool, has_updated: bool) -> str:
+    """
+    Build the template for the PRD title and timestamps, given which meta fields are set.
+    
+    Args:
+        has_title: Whether the meta has a title.
+        has_created: Whether the meta has a creation time.
+        has_updated: Whether the meta has a last update time.
+        
+    Returns:
+        str: A template to fill with str.format_map(meta).
+    """
+    template = "# {title}\n\n" if has_title else "# Product Requirements Document\n\n"
+    
+    # Created and Updated timestamps
+    metadata = []
+    if has_created:
+        metadata.append("**Created:** {createdAt}")
+    if has_updated:
+        metadata.append("**Last Updated:** {updatedAt}")
+    
+    if metadata:
+        template += f"{' | '.join(metadata)}\n\n"
+    return template
+
+
+# Title and timestamp templates for every combination of (title, createdAt, updatedAt) being set
+_META_TEMPLATES = {
+    flags: _meta_template(*flags)
+    for flags in itertools.product((False, True), repeat=3)
+}
+
+
+# Layout of the PRD body, in document order. Each section is (key in the Paid data,
+# section heading or None, fields); each field is (key in the section, template, renderer).
+# A field is written only when its value is truthy, by formatting the renderer's output
+# into the template.
+_SECTIONS = (
+    ("problem", "## 📌 Problem Statement\n\n", (
+        ("statement", "{}\n\n", str),
+        ("currentSolutions", "### Current Solutions\n\n{}\n\n", str),
+        ("painPoints", "### Pain Points\n\n{}\n", _bullets),
+    )),
+    # The personas heading is only written when there are personas to list
+    ("users", None, (
+        ("personas", "## 👥 User Personas\n\n{}", _personas),
+    )),
+    ("valueProposition", "## 💡 Value Proposition\n\n", (
+        ("oneLiner", "> {}\n\n", str),
+        ("primaryBenefit", "### Primary Benefit\n\n{}\n\n", str),
+        ("uniqueDifferentiators", "### Unique Differentiators\n\n{}\n", _bullets),
+    )),
+    ("approach", "## 🛠️ Approach\n\n", (
+        ("coreConcept", "### Core Concept\n\n{}\n\n", str),
+        ("mvpFeatures", "### MVP Features\n\n{}\n", _bullets),
+        ("technicalConsiderations", "### Technical Considerations\n\n{}\n", _bullets),
+    )),
+    ("userExperience", "## 🖥️ User Experience\n\n", (
+        ("summary", "{}\n\n", str),
+        ("userFlows", "### User Flows\n\n{}", _user_flows),
+    )),
+)
+
+
+# Top-level keys of the Paid data that the PRD renders
+_PRD_KEYS = frozenset(["meta"] + [spec[0] for spec in _SECTIONS])
+
+# Header used when the Paid data has no meta, and the whole document when it has nothing else either
+_GENERATED_HEADER = "# Product Requirements Document\n\n**Generated:** {}\n\n"
+_EMPTY_PRD = _GENERATED_HEADER[:-1]
+
+
+def _render_section(data: Dict[str, Any], spec: Tuple) -> Iterator[str]:
+    """
+    Render one section of the PRD body, as laid out in _SECTIONS.
+    
+    Args:
+        data: The section's data from the Paid data structure.
+        spec: The section's (key, heading, fields) entry from _SECTIONS.
+        
+    Yields:
+        str: The section's Markdown blocks, each ending with a newline.
+    """
+    _, heading, fields = spec
+    if heading:
+        yield heading
+    for key, template, render in fields:
+        value = data.get(key)
+        if value:
+            yield template.format(render(value))
+
+
+def _render_blocks(paid_data: Dict[str, Any]) -> Iterator[str]:
+    """
+    Render the PRD as a sequence of Markdown blocks, starting with the title.
+    
+    Args:
+        paid_data: The Paid data structure from the design state.
+        
+    Yields:
+        str: The Markdown blocks, each ending with a newline.
+    """
+    # Title and metadata
+    meta = paid_data.get("meta")
+    if meta is not None:
+        template = _META_TEMPLATES[bool(meta.get("title")), bool(meta.get("createdAt")), bool(meta.get("updatedAt"))]
+        yield template.format_map(meta)
+    else:
+        yield _GENERATED_HEADER.format(_now_str())
+    
+    # Body sections
+    for spec in _SECTIONS:
+        data = paid_data.get(spec[0])
+        if data is not None:
+            yield from _render_section(data, spec)
+
+
+def iter_md_from_design_state(design_state: Dict[str, Any]) -> Iterator[str]:
+    """
+    Generate the Markdown representation of the PRD chunk by chunk, so it can be
+    written out without building the whole document in memory.
+    
+    Args:
+        design_state: The design state dictionary with Paid format.
+        
+    Yields:
+        str: Consecutive chunks of the Markdown document.
+    """
+    if not design_state or "Paid" not in design_state:
+        yield "# No design information available\n\nStart a conversation to build your PRD."
+        return
+    
+    paid_data = design_state["Paid"]
+    
+    # Nothing to render but the fallback header
+    if _PRD_KEYS.isdisjoint(paid_data):
+        yield _EMPTY_PRD.format(_now_str())
+        return
+    
+    # The document doesn't end with a newline of its own, so hold each block back
+    # until the next one arrives and drop the newline from the last block
+    blocks = _render_blocks(paid_data)
+    previous = next(blocks)
+    for block in blocks:
+        yield previous
+        previous = block
+    yield previous[:-1]
 
 
 def generate_md_from_design_state(design_state: Dict[str, Any]) -> str:
@@ -21,197 +301,38 @@ def generate_md_from_design_state(design_state: Dict[str, Any]) -> str:
     Returns:
         str: The Markdown representation of the PRD.
     """
-    if not design_state or "Paid" not in design_state:
-        return "# No design information available\n\nStart a conversation to build your PRD."
+    return "".join(iter_md_from_design_state(design_state))
+
+
+def _write_markdown(file_path: str, chunks: Iterable[str]) -> None:
+    """
+    Write Markdown chunks to a file, creating its directory if needed.
     
-    # Get the Paid data
-    paid_data = design_state["Paid"]
+    The chunks are written to a temporary file that only replaces file_path once
+    they have all been written, so an error while rendering leaves any existing
+    file untouched.
     
-    # Start building the Markdown document
-    lines = []
+    Args:
+        file_path: The path where to save the file.
+        chunks: Consecutive chunks of the Markdown document.
+    """
+    # Make sure the directory exists
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
     
-    # Title and metadata
-    if "meta" in paid_data:
-        meta = paid_data["meta"]
-        if meta.get("title"):
-            lines.append(f"# {meta['title']}")
-            lines.append("")
-        else:
-            lines.append("# Product Requirements Document")
-            lines.append("")
-        
-        # Created and Updated timestamps
-        metadata = []
-        if meta.get("createdAt"):
-            metadata.append(f"**Created:** {meta['createdAt']}")
-        if meta.get("updatedAt"):
-            metadata.append(f"**Last Updated:** {meta['updatedAt']}")
-        
-        if metadata:
-            lines.append(" | ".join(metadata))
-            lines.append("")
-    else:
-        lines.append("# Product Requirements Document")
-        lines.append("")
-        lines.append(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append("")
-    
-    # Problem Statement Section
-    if "problem" in paid_data:
-        problem = paid_data["problem"]
-        
-        lines.append("## 📌 Problem Statement")
-        lines.append("")
-        
-        if problem.get("statement"):
-            lines.append(problem["statement"])
-            lines.append("")
-        
-        # Current Solutions
-        if problem.get("currentSolutions"):
-            lines.append("### Current Solutions")
-            lines.append("")
-            lines.append(problem["currentSolutions"])
-            lines.append("")
-        
-        # Pain Points
-        if problem.get("painPoints") and len(problem["painPoints"]) > 0:
-            lines.append("### Pain Points")
-            lines.append("")
-            for point in problem["painPoints"]:
-                lines.append(f"- {point}")
-            lines.append("")
-    
-    # User Personas Section
-    if "users" in paid_data and "personas" in paid_data["users"] and len(paid_data["users"]["personas"]) > 0:
-        lines.append("## 👥 User Personas")
-        lines.append("")
-        
-        personas = paid_data["users"]["personas"]
-        for persona in personas:
-            if persona.get("name"):
-                lines.append(f"### Persona: {persona['name']}")
-                lines.append("")
-                
-                if persona.get("demographics"):
-                    lines.append("#### Demographics")
-                    lines.append("")
-                    lines.append(persona["demographics"])
-                    lines.append("")
-                
-                if persona.get("behaviors"):
-                    lines.append("#### Behaviors")
-                    lines.append("")
-                    lines.append(persona["behaviors"])
-                    lines.append("")
-                
-                # Jobs to be done
-                if persona.get("jobsToBeDone") and len(persona["jobsToBeDone"]) > 0:
-                    lines.append("#### Jobs to be Done")
-                    lines.append("")
-                    for job in persona["jobsToBeDone"]:
-                        lines.append(f"- {job}")
-                    lines.append("")
-                
-                # Frustrations
-                if persona.get("frustrations") and len(persona["frustrations"]) > 0:
-                    lines.append("#### Frustrations")
-                    lines.append("")
-                    for frustration in persona["frustrations"]:
-                        lines.append(f"- {frustration}")
-                    lines.append("")
-    
-    # Value Proposition Section
-    if "valueProposition" in paid_data:
-        vp = paid_data["valueProposition"]
-        
-        lines.append("## 💡 Value Proposition")
-        lines.append("")
-        
-        if vp.get("oneLiner"):
-            lines.append(f"> {vp['oneLiner']}")
-            lines.append("")
-        
-        if vp.get("primaryBenefit"):
-            lines.append("### Primary Benefit")
-            lines.append("")
-            lines.append(vp["primaryBenefit"])
-            lines.append("")
-        
-        if vp.get("uniqueDifferentiators") and len(vp["uniqueDifferentiators"]) > 0:
-            lines.append("### Unique Differentiators")
-            lines.append("")
-            for diff in vp["uniqueDifferentiators"]:
-                lines.append(f"- {diff}")
-            lines.append("")
-    
-    # Approach Section
-    if "approach" in paid_data:
-        approach = paid_data["approach"]
-        
-        lines.append("## 🛠️ Approach")
-        lines.append("")
-        
-        if approach.get("coreConcept"):
-            lines.append("### Core Concept")
-            lines.append("")
-            lines.append(approach["coreConcept"])
-            lines.append("")
-        
-        # MVP Features
-        if approach.get("mvpFeatures") and len(approach["mvpFeatures"]) > 0:
-            lines.append("### MVP Features")
-            lines.append("")
-            for feature in approach["mvpFeatures"]:
-                lines.append(f"- {feature}")
-            lines.append("")
-        
-        # Technical Considerations
-        if approach.get("technicalConsiderations") and len(approach["technicalConsiderations"]) > 0:
-            lines.append("### Technical Considerations")
-            lines.append("")
-            for tech in approach["technicalConsiderations"]:
-                lines.append(f"- {tech}")
-            lines.append("")
-    
-    # User Experience Section
-    if "userExperience" in paid_data:
-        ux = paid_data["userExperience"]
-        
-        lines.append("## 🖥️ User Experience")
-        lines.append("")
-        
-        if ux.get("summary"):
-            lines.append(ux["summary"])
-            lines.append("")
-        
-        # User Flows
-        if ux.get("userFlows") and len(ux["userFlows"]) > 0:
-            lines.append("### User Flows")
-            lines.append("")
-            
-            for flow in ux["userFlows"]:
-                if flow.get("flowName"):
-                    lines.append(f"#### {flow['flowName']}")
-                    lines.append("")
-                    
-                    if flow.get("description"):
-                        lines.append(flow["description"])
-                        lines.append("")
-                    
-                    if flow.get("steps") and len(flow["steps"]) > 0:
-                        lines.append("**Steps:**")
-                        lines.append("")
-                        for step in flow["steps"]:
-                            if "step" in step and "name" in step:
-                                line = f"{step['step']}. **{step['name']}**"
-                                if "description" in step:
-                                    line += f": {step['description']}"
-                                lines.append(line)
-                        lines.append("")
-    
-    # Join all lines and return the Markdown content
-    return "\n".join(lines)
+    # Stream the Markdown straight into a large write buffer, next to the target
+    # so the final rename stays on the same filesystem. The file is created with
+    # the same mode open() would use, so the process umask applies as usual.
+    temp_path = os.path.join(directory, f".prd-{uuid.uuid4().hex}.tmp")
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'w', buffering=1 << 20, encoding='utf-8') as f:
+            f.writelines(chunks)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
 
 
 def save_prd_to_file(design_state: Dict[str, Any], file_path: str) -> Tuple[bool, str]:
@@ -226,23 +347,158 @@ def save_prd_to_file(design_state: Dict[str, Any], file_path: str) -> Tuple[bool
         Tuple[bool, str]: Success status and message.
     """
     try:
-        # Generate Markdown content
-        md_content = generate_md_from_design_state(design_state)
+        _write_markdown(file_path, iter_md_from_design_state(design_state))
         
-        # Make sure the directory exists
-        directory = os.path.dirname(file_path)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory)
+        return True, f"PRD successfully saved to {file_path}"
+    except Exception as e:
+        return False, f"Error saving PRD: {str(e)}"
+
+
+def _session_markdown(session_id: str, state_id: int, design_state: Dict[str, Any]) -> str:
+    """
+    Get the Markdown for a session's PRD, reusing the last export if no design
+    state has been saved since.
+    
+    Args:
+        session_id: The ID of the session.
+        state_id: The ID of the DesignState row the design state was read from.
+        design_state: The session's latest design state.
+        
+    Returns:
+        str: The Markdown representation of the PRD.
+    """
+    with _prd_cache_lock:
+        cached = _prd_cache.get(session_id)
+        if cached is not None and cached[0] == state_id:
+            _prd_cache.move_to_end(session_id)
+            return cached[1]
+    
+    md_content = generate_md_from_design_state(design_state)
+    
+    # Without meta the header holds the current time, which mustn't be reused
+    if design_state["Paid"].get("meta") is None:
+        return md_content
+    
+    with _prd_cache_lock:
+        _prd_cache[session_id] = (state_id, md_content)
+        _prd_cache.move_to_end(session_id)
+        # Evict the least recently exported sessions so the cache doesn't grow unbounded
+        while len(_prd_cache) > _PRD_CACHE_SIZE:
+            _prd_cache.popitem(last=False)
+    return md_content
+
+
+def _save_session_prd(session_id: str, state_id: int, design_state: Dict[str, Any], file_path: str) -> Tuple[bool, str]:
+    """
+    Save a session's PRD to a Markdown file.
+    
+    Args:
+        session_id: The ID of the session.
+        state_id: The ID of the DesignState row the design state was read from.
+        design_state: The session's latest design state.
+        file_path: The path where to save the Markdown file.
         
-        # Write to file
-        with open(file_path, 'w') as f:
-            f.write(md_content)
+    Returns:
+        Tuple[bool, str]: Success status and message.
+    """
+    try:
+        _write_markdown(file_path, (_session_markdown(session_id, state_id, design_state),))
         
         return True, f"PRD successfully saved to {file_path}"
     except Exception as e:
         return False, f"Error saving PRD: {str(e)}"
 
 
+class AsyncPrdWriter:
+    """Writes PRD files on a background thread so callers don't wait on disk I/O."""
+    
+    def __init__(self):
+        self._queue: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def _run(self) -> None:
+        """Drain the queue forever, writing each file in turn."""
+        while True:
+            file_path, md_content = self._queue.get()
+            try:
+                _write_markdown(file_path, (md_content,))
+            except Exception as e:
+                print(f"Error saving PRD to {file_path}: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def write(self, file_path: str, md_content: str) -> None:
+        """
+        Queue a file to be written by the background thread.
+        
+        Args:
+            file_path: The path where to save the file.
+            md_content: The content to write.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        
+        self._queue.put((file_path, md_content))
+    
+    def flush(self) -> None:
+        """Block until all queued files have been written."""
+        self._queue.join()
+
+
+_writer = AsyncPrdWriter()
+
+
+def save_prd_to_file_async(design_state: Dict[str, Any], file_path: str) -> Tuple[bool, str]:
+    """
+    Save the PRD to a Markdown file without waiting for the write to finish.
+    
+    The Markdown is generated straight away and the file is written by a background
+    thread. Use flush_prd_writes() to wait until all queued files are written.
+    
+    Args:
+        design_state: The design state dictionary.
+        file_path: The path where to save the Markdown file.
+        
+    Returns:
+        Tuple[bool, str]: Success status and message.
+    """
+    try:
+        md_content = generate_md_from_design_state(design_state)
+        
+        _writer.write(file_path, md_content)
+        
+        return True, f"PRD queued to be saved to {file_path}"
+    except Exception as e:
+        return False, f"Error saving PRD: {str(e)}"
+
+
+def flush_prd_writes() -> None:
+    """Block until all PRD files queued by save_prd_to_file_async have been written."""
+    _writer.flush()
+
+
+def _prd_filename(design_state: Dict[str, Any]) -> str:
+    """
+    Get the filename for a PRD export, based on the title in the design state.
+    
+    Args:
+        design_state: The design state dictionary with Paid format.
+        
+    Returns:
+        str: The Markdown filename.
+    """
+    if "meta" in design_state["Paid"] and design_state["Paid"]["meta"].get("title"):
+        # Use the title from the design state
+        title = design_state["Paid"]["meta"]["title"]
+        # Convert to a filename-friendly format
+        return _FILENAME_SAFE.sub('_', title.lower()) + ".md"
+    return "product_requirements_document.md"
+
+
 def export_prd_from_session(session_id: str, output_dir: str = None) -> Tuple[bool, str]:
     """
     Export the PRD for a specific session to a Markdown file.
@@ -255,37 +511,81 @@ def export_prd_from_session(session_id: str, output_dir: str = None) -> Tuple[bo
     Returns:
         Tuple[bool, str]: Success status and message (including the file path if successful).
     """
-    from paid.database import get_latest_design_state
-    
     try:
         # Get the latest design state
-        design_state = get_latest_design_state(session_id)
+        state_id, design_state = get_latest_design_states_with_ids([session_id]).get(session_id, (None, None))
         
         if not design_state or "Paid" not in design_state:
             return False, "No valid design state found for this session."
         
         # Generate a filename based on the design state
-        filename = "product_requirements_document.md"
-        if "meta" in design_state["Paid"] and design_state["Paid"]["meta"].get("title"):
-            # Use the title from the design state
-            title = design_state["Paid"]["meta"]["title"]
-            # Convert to a filename-friendly format
-            import re
-            filename = re.sub(r'[^\w\-_]', '_', title.lower()) + ".md"
+        filename = _prd_filename(design_state)
         
         # Default to the current directory if no output directory is provided
         if not output_dir:
             output_dir = os.getcwd()
         
         # Ensure the output directory exists
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
         
         # Full path to the output file
         output_path = os.path.join(output_dir, filename)
         
         # Save the PRD to the file
-        return save_prd_to_file(design_state, output_path)
+        return _save_session_prd(session_id, state_id, design_state, output_path)
     
     except Exception as e:
-        return False, f"Error exporting PRD: {str(e)}"
\ No newline at end of file
+        return False, f"Error exporting PRD: {str(e)}"
+
+def export_prds_from_sessions(session_ids: List[str], output_dir: str = None) -> Dict[str, Tuple[bool, str]]:
+    """
+    Export the PRDs for several sessions to Markdown files.
+    
+    The design states are loaded together and the files are written in parallel.
+    
+    Args:
+        session_ids: The IDs of the sessions.
+        output_dir: Optional directory to save the files to. If not provided,
+                    it will use the current directory.
+        
+    Returns:
+        Dict[str, Tuple[bool, str]]: Success status and message for each session.
+    """
+    session_ids = list(dict.fromkeys(session_ids))
+    results = {}
+    
+    try:
+        # Get the latest design states in one go
+        design_states = get_latest_design_states_with_ids(session_ids)
+        
+        # Default to the current directory if no output directory is provided
+        if not output_dir:
+            output_dir = os.getcwd()
+        
+        # Ensure the output directory exists
+        os.makedirs(output_dir, exist_ok=True)
+        
+        futures = {}
+        filenames = set()
+        with ThreadPoolExecutor(max_workers=_EXPORT_WORKERS) as executor:
+            for session_id in session_ids:
+                state_id, design_state = design_states.get(session_id, (None, None))
+                if not design_state or "Paid" not in design_state:
+                    results[session_id] = (False, "No valid design state found for this session.")
+                    continue
+                
+                # Sessions with the same title would otherwise overwrite each other's file
+                filename = _prd_filename(design_state)
+                if filename in filenames:
+                    filename = f"{filename[:-3]}_{session_id}.md"
+                filenames.add(filename)
+                
+                futures[session_id] = executor.submit(_save_session_prd, session_id, state_id, design_state, os.path.join(output_dir, filename))
+        
+        for session_id, future in futures.items():
+            results[session_id] = future.result()
+    
+    except Exception as e:
+        return {session_id: (False, f"Error exporting PRD: {str(e)}") for session_id in session_ids}
+    
+    return {session_id: results[session_id] for session_id in session_ids}
@@ -0,0 +1,59 @@
+"""
+JSON serialization helpers used throughout the PAID system.
+
+Uses orjson when it is installed and falls back to the standard library otherwise.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+
+def dumps(value: Any, sort_keys: bool = False) -> str:
+    """
+    Serialize a value to a compact JSON string.
+
+    Args:
+        value: The value to serialize.
+        sort_keys: Whether to sort dictionary keys for a stable output.
+
+    Returns:
+        str: The JSON string.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS if sort_keys else 0).decode()
+    return json.dumps(value, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False)
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """
+    Serialize a value to compact UTF-8 encoded JSON.
+
+    Args:
+        value: The value to serialize.
+
+    Returns:
+        bytes: The encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return dumps(value).encode()
+
+
+def loads(text: Union[str, bytes]) -> Any:
+    """
+    Deserialize a JSON string.
+
+    Args:
+        text: The JSON string or bytes.
+
+    Returns:
+        Any: The deserialized value.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
@@ -0,0 +1,153 @@
+import json
+import threading
+import pytest
+from paid.database import operations
+from paid.database.models import db, DesignSession, DesignState, initialize_db
+from paid.database import (
+    setup_database,
+    create_session,
+    update_design_state,
+    get_latest_design_state,
+    get_latest_design_states,
+    get_latest_instructions,
+    add_conversation_message,
+    flush_conversations,
+    get_conversation_history,
+    get_session_version
+)
+
+@pytest.fixture(scope="module", autouse=True)
+def temp_database(tmp_path_factory):
+    """Point the models at a fresh database file; each test uses its own session."""
+    db.init(str(tmp_path_factory.mktemp("db") / "test_paid_design.db"))
+    setup_database()
+    yield
+    flush_conversations()
+    db.close()
+
+def test_conversation_round_trip():
+    """Test that messages are stored and returned in order."""
+    session_id = create_session()
+    add_conversation_message(session_id, "user", "I want to build a climbing app")
+    add_conversation_message(session_id, "agent", "Who is it for?")
+
+    history = get_conversation_history(session_id)
+
+    assert [m["speaker"] for m in history] == ["user", "agent"]
+    assert history[0]["message"] == "I want to build a climbing app"
+
+def test_latest_design_state():
+    """Test that the most recent design state and instructions are returned."""
+    session_id = create_session()
+    assert get_latest_design_state(session_id) is None
+
+    update_design_state(session_id, {"Paid": {"meta": {"title": "First"}}})
+    update_design_state(session_id, {"Paid": {"meta": {"title": "Second"}}}, "CUSTOM GUIDANCE:")
+
+    assert get_latest_design_state(session_id)["Paid"]["meta"]["title"] == "Second"
+    assert get_latest_instructions(session_id) == "CUSTOM GUIDANCE:"
+
+def test_latest_design_state_is_a_fresh_copy():
+    """Test that callers can't corrupt the cached state and that other writers' states are picked up."""
+    session_id = create_session()
+    update_design_state(session_id, {"Paid": {"meta": {"title": "Mine"}}})
+
+    get_latest_design_state(session_id)["Paid"]["meta"]["title"] = "Mutated"
+    assert get_latest_design_state(session_id)["Paid"]["meta"]["title"] == "Mine"
+
+    # A state written without update_design_state, as another process would
+    external = DesignState(session=session_id)
+    external.state = {"Paid": {"meta": {"title": "External"}}}
+    external.save()
+
+    assert get_latest_design_state(session_id)["Paid"]["meta"]["title"] == "External"
+    assert get_latest_design_states([session_id])[session_id]["Paid"]["meta"]["title"] == "External"
+
+def test_legacy_state_json_rows_are_migrated(tmp_path):
+    """Test that initialize_db compresses state_json rows from before the state_blob column."""
+    original_path = db.database
+    db.close()
+    db.init(str(tmp_path / "legacy.db"))
+    try:
+        db.create_tables([DesignSession])
+        db.execute_sql(
+            'CREATE TABLE designstate (id INTEGER NOT NULL PRIMARY KEY, session_id VARCHAR(255) NOT NULL, '
+            'state_json TEXT NOT NULL, created_at DATETIME NOT NULL)'
+        )
+        session_id = create_session()
+        state = {"Paid": {"meta": {"title": "Legacy"}, "problem": {"painPoints": ["Slow", "Manual"]}}}
+        db.execute_sql(
+            'INSERT INTO designstate (session_id, state_json, created_at) VALUES (?, ?, ?)',
+            (session_id, json.dumps(state), "2024-01-01 00:00:00")
+        )
+
+        initialize_db()
+
+        row = DesignState.get(DesignState.session == session_id)
+        assert row.state_blob is not None and row.state_json == ""
+        assert get_latest_design_state(session_id) == state
+    finally:
+        db.close()
+        db.init(original_path)
+        db.connect()
+
+def test_latest_design_states():
+    """Test that the bulk lookup returns each session's most recent design state."""
+    first, second, empty = create_session(), create_session(), create_session()
+    update_design_state(first, {"Paid": {"meta": {"title": "Old"}}})
+    update_design_state(first, {"Paid": {"meta": {"title": "New"}}})
+    update_design_state(second, {"Paid": {"meta": {"title": "Other"}}})
+
+    states = get_latest_design_states([first, second, empty])
+
+    assert {k: v["Paid"]["meta"]["title"] for k, v in states.items()} == {first: "New", second: "Other"}
+
+def test_message_for_unknown_session_is_dropped():
+    """Test that a message for an unknown session doesn't block valid messages in the same batch."""
+    session_id = create_session()
+    add_conversation_message("missing-session", "user", "Hello")
+    add_conversation_message(session_id, "user", "Hello")
+    flush_conversations()
+
+    assert get_conversation_history("missing-session") == []
+    assert len(get_conversation_history(session_id)) == 1
+
+def test_flush_waits_only_for_its_session(monkeypatch):
+    """Test that flushing one session doesn't wait for another session's pending writes."""
+    busy, idle = create_session(), create_session()
+    write_started, release_write = threading.Event(), threading.Event()
+    write_batch = operations._write_conversation_batch
+
+    def slow_write(batch):
+        write_started.set()
+        release_write.wait(5)
+        write_batch(batch)
+
+    monkeypatch.setattr(operations, "_write_conversation_batch", slow_write)
+    add_conversation_message(busy, "user", "Hello")
+    assert write_started.wait(5)
+
+    idle_flush = threading.Thread(target=flush_conversations, args=(idle,))
+    idle_flush.start()
+    idle_flush.join(1)
+    idle_flushed = not idle_flush.is_alive()
+
+    release_write.set()
+    flush_conversations(busy)
+
+    assert idle_flushed
+    assert len(get_conversation_history(busy)) == 1
+
+def test_session_version_changes_on_write():
+    """Test that the version stamp changes when messages or states are added."""
+    session_id = create_session()
+    assert get_session_version(session_id) == (0, 0)
+
+    add_conversation_message(session_id, "user", "Hello")
+    after_message = get_session_version(session_id)
+    update_design_state(session_id, {"Paid": {}})
+    after_state = get_session_version(session_id)
+
+    assert after_message[0] > 0
+    assert after_state[0] == after_message[0]
+    assert after_state[1] > after_message[1]
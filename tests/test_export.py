@@ -0,0 +1,250 @@
+import os
+import pytest
+from peewee import OperationalError
+from paid.database.models import db, DesignState
+from paid.database import setup_database, create_session, update_design_state, flush_conversations
+from paid.frontend import export
+from paid.frontend.export import (
+    generate_md_from_design_state,
+    export_prds_from_sessions,
+    save_prd_to_file,
+    save_prd_to_file_async,
+    flush_prd_writes
+)
+
+@pytest.fixture(scope="module", autouse=True)
+def temp_database(tmp_path_factory):
+    """Point the models at a fresh database file; each test uses its own session."""
+    db.init(str(tmp_path_factory.mktemp("db") / "test_paid_export.db"))
+    setup_database()
+    yield
+    flush_conversations()
+    db.close()
+
+FULL_STATE = {
+    "Paid": {
+        "meta": {"title": "Climb Log", "createdAt": "2025-01-01", "updatedAt": "2025-01-02"},
+        "problem": {
+            "statement": "Climbers lose track of their progress.",
+            "currentSolutions": "Paper notebooks.",
+            "painPoints": ["Notes get lost", "No trends"]
+        },
+        "users": {
+            "personas": [
+                {
+                    "name": "Sam",
+                    "demographics": "25-35, city gym member",
+                    "behaviors": "Climbs three times a week",
+                    "jobsToBeDone": ["Log sends"],
+                    "frustrations": ["Forgets grades", "Slow apps"]
+                },
+                {"demographics": "Skipped without a name"}
+            ]
+        },
+        "valueProposition": {
+            "oneLiner": "Your climbing diary.",
+            "primaryBenefit": "See progress at a glance.",
+            "uniqueDifferentiators": ["Grade charts"]
+        },
+        "approach": {
+            "coreConcept": "Quick logging after each route.",
+            "mvpFeatures": ["Route log", 2],
+            "technicalConsiderations": []
+        },
+        "userExperience": {
+            "summary": "Log a climb in two taps.",
+            "userFlows": [
+                {
+                    "flowName": "Log a climb",
+                    "description": "After finishing a route.",
+                    "steps": [
+                        {"step": 1, "name": "Open app"},
+                        {"name": "Skipped without a number"},
+                        {"step": 2, "name": "Pick grade", "description": "From a list"}
+                    ]
+                },
+                {"description": "Skipped without a name"}
+            ]
+        }
+    }
+}
+
+FULL_PRD = """# Climb Log
+
+**Created:** 2025-01-01 | **Last Updated:** 2025-01-02
+
+## 📌 Problem Statement
+
+Climbers lose track of their progress.
+
+### Current Solutions
+
+Paper notebooks.
+
+### Pain Points
+
+- Notes get lost
+- No trends
+
+## 👥 User Personas
+
+### Persona: Sam
+
+#### Demographics
+
+25-35, city gym member
+
+#### Behaviors
+
+Climbs three times a week
+
+#### Jobs to be Done
+
+- Log sends
+
+#### Frustrations
+
+- Forgets grades
+- Slow apps
+
+## 💡 Value Proposition
+
+> Your climbing diary.
+
+### Primary Benefit
+
+See progress at a glance.
+
+### Unique Differentiators
+
+- Grade charts
+
+## 🛠️ Approach
+
+### Core Concept
+
+Quick logging after each route.
+
+### MVP Features
+
+- Route log
+- 2
+
+## 🖥️ User Experience
+
+Log a climb in two taps.
+
+### User Flows
+
+#### Log a climb
+
+After finishing a route.
+
+**Steps:**
+
+1. **Open app**
+2. **Pick grade**: From a list
+"""
+
+NO_DESIGN_PRD = "# No design information available\n\nStart a conversation to build your PRD."
+GENERATED_PRD = "# Product Requirements Document\n\n**Generated:** 2025-01-01 12:00:00\n"
+
+@pytest.mark.parametrize("design_state, expected", [
+    (FULL_STATE, FULL_PRD),
+    (None, NO_DESIGN_PRD),
+    ({}, NO_DESIGN_PRD),
+    ({"Paid": {}}, GENERATED_PRD),
+    ({"Paid": {"meta": {"title": "Only Meta", "updatedAt": "2025-01-02"}}}, "# Only Meta\n\n**Last Updated:** 2025-01-02\n"),
+    ({"Paid": {"roadmap": {"q1": "Ship"}}, "other": 1}, GENERATED_PRD),
+], ids=["full", "none", "empty", "paid_empty", "meta_only", "unknown_keys"])
+def test_prd_markdown(monkeypatch, design_state, expected):
+    """Test that the PRD Markdown matches the expected document exactly."""
+    monkeypatch.setattr(export, "_now_str", lambda: "2025-01-01 12:00:00")
+
+    assert generate_md_from_design_state(design_state) == expected
+    assert "".join(export.iter_md_from_design_state(design_state)) == expected
+
+def test_batch_export(tmp_path):
+    """Test that a batch export writes one file per session without overwriting shared titles."""
+    first, second, missing = create_session(), create_session(), create_session()
+    update_design_state(first, FULL_STATE)
+    update_design_state(second, FULL_STATE)
+
+    results = export_prds_from_sessions([first, second, missing, first], str(tmp_path))
+
+    # Duplicate session IDs are exported once, in the order given
+    assert list(results) == [first, second, missing]
+    assert results[first] == (True, f"PRD successfully saved to {tmp_path / 'climb_log.md'}")
+    assert results[second] == (True, f"PRD successfully saved to {tmp_path / f'climb_log_{second}.md'}")
+    assert results[missing] == (False, "No valid design state found for this session.")
+    assert sorted(os.listdir(tmp_path)) == ["climb_log.md", f"climb_log_{second}.md"]
+    assert (tmp_path / f"climb_log_{second}.md").read_text(encoding="utf-8") == FULL_PRD
+
+def test_batch_export_reports_database_errors(tmp_path, monkeypatch):
+    """Test that a failed design state query is reported as an error, not as a missing state."""
+    first, second = create_session(), create_session()
+    update_design_state(first, FULL_STATE)
+
+    def failing_select(*args, **kwargs):
+        raise OperationalError("database is locked")
+
+    monkeypatch.setattr(DesignState, "select", failing_select)
+
+    results = export_prds_from_sessions([first, second], str(tmp_path))
+
+    assert results == {
+        first: (False, "Error exporting PRD: database is locked"),
+        second: (False, "Error exporting PRD: database is locked")
+    }
+    assert os.listdir(tmp_path) == []
+
+def test_async_save(tmp_path):
+    """Test that a queued PRD is on disk once the writes are flushed."""
+    file_path = tmp_path / "prds" / "climb_log.md"
+
+    assert save_prd_to_file_async(FULL_STATE, str(file_path)) == (True, f"PRD queued to be saved to {file_path}")
+    flush_prd_writes()
+
+    assert file_path.read_text(encoding="utf-8") == FULL_PRD
+
+def test_session_markdown_reused_until_state_changes(monkeypatch):
+    """Test that a session's Markdown is only regenerated when a new design state is saved."""
+    calls = []
+    monkeypatch.setattr(export, "generate_md_from_design_state", lambda state: calls.append(state) or generate_md_from_design_state(state))
+    session_id = create_session()
+    first_id = update_design_state(session_id, FULL_STATE).id
+    second_id = update_design_state(session_id, {"Paid": {"meta": {"title": "Renamed"}}}).id
+
+    assert export._session_markdown(session_id, first_id, FULL_STATE) == FULL_PRD
+    assert export._session_markdown(session_id, first_id, FULL_STATE) == FULL_PRD
+    assert len(calls) == 1
+
+    assert export._session_markdown(session_id, second_id, {"Paid": {"meta": {"title": "Renamed"}}}) == "# Renamed\n"
+    assert len(calls) == 2
+
+def test_session_markdown_with_generated_time_is_not_reused(monkeypatch):
+    """Test that Markdown stamped with the current time is regenerated on every export."""
+    session_id = create_session()
+    state_id = update_design_state(session_id, {"Paid": {"problem": {"statement": "Slow"}}}).id
+
+    monkeypatch.setattr(export, "_now_str", lambda: "2025-01-01 12:00:00")
+    assert "**Generated:** 2025-01-01 12:00:00" in export._session_markdown(session_id, state_id, {"Paid": {"problem": {"statement": "Slow"}}})
+
+    monkeypatch.setattr(export, "_now_str", lambda: "2025-01-02 08:30:00")
+    assert "**Generated:** 2025-01-02 08:30:00" in export._session_markdown(session_id, state_id, {"Paid": {"problem": {"statement": "Slow"}}})
+
+def test_save_replaces_file_only_when_complete(tmp_path):
+    """Test that saved PRDs get open()'s permissions and a failed render keeps the old file."""
+    file_path = tmp_path / "climb_log.md"
+    reference_path = tmp_path / "reference.md"
+    reference_path.write_text("")
+
+    assert save_prd_to_file(FULL_STATE, str(file_path))[0]
+    assert file_path.read_text(encoding="utf-8") == FULL_PRD
+    assert os.stat(file_path).st_mode == os.stat(reference_path).st_mode
+
+    # painPoints must be a list, so rendering fails partway through the document
+    broken_state = {"Paid": {"meta": {"title": "Broken"}, "problem": {"painPoints": 5}}}
+    assert not save_prd_to_file(broken_state, str(file_path))[0]
+    assert file_path.read_text(encoding="utf-8") == FULL_PRD
+    assert sorted(os.listdir(tmp_path)) == ["climb_log.md", "reference.md"]
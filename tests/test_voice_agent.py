@@ -0,0 +1,88 @@
+import os
+import pytest
+from paid.agents import voice_agent
+
+class FakeElevenLabs:
+    """Stands in for the ElevenLabs client, returning the audio as chunks like the SDK."""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, text, voice, model):
+        self.calls.append((voice, text))
+        return iter([f"{voice}:".encode(), text.encode()])
+
+@pytest.fixture
+def tts_cache(tmp_path, monkeypatch):
+    """Give each test an empty speech cache on disk and in memory."""
+    monkeypatch.setattr(voice_agent, "_TTS_CACHE_DIR", tmp_path / "tts")
+    monkeypatch.setattr(voice_agent, "_tts_memory_cache", voice_agent.OrderedDict())
+    return tmp_path / "tts"
+
+def test_synthesize_cached_hits_and_misses(tts_cache):
+    """Test that repeated phrases are served from memory, then disk, without calling ElevenLabs."""
+    client, other_client = FakeElevenLabs(), FakeElevenLabs()
+
+    assert voice_agent._synthesize_cached(client, "voice", "Hello") == b"voice:Hello"
+    assert len(os.listdir(tts_cache)) == 1
+
+    # Another agent's client shares the cached audio
+    assert voice_agent._synthesize_cached(other_client, "voice", "Hello") == b"voice:Hello"
+
+    # Served from disk once it has left the memory cache
+    voice_agent._tts_memory_cache.clear()
+    assert voice_agent._synthesize_cached(other_client, "voice", "Hello") == b"voice:Hello"
+
+    # A different voice is a miss
+    assert voice_agent._synthesize_cached(other_client, "other", "Hello") == b"other:Hello"
+
+    assert client.calls == [("voice", "Hello")]
+    assert other_client.calls == [("other", "Hello")]
+
+def test_disk_cache_is_pruned(tts_cache, monkeypatch):
+    """Test that the least recently used audio is deleted once the disk cache is over its size limit."""
+    monkeypatch.setattr(voice_agent, "_TTS_DISK_CACHE_MAX_BYTES", 30)
+    client = FakeElevenLabs()
+
+    voice_agent._synthesize_cached(client, "voice", "first phrase")
+    first_file = os.listdir(tts_cache)[0]
+    os.utime(tts_cache / first_file, (0, 0))
+    voice_agent._synthesize_cached(client, "voice", "second phrase")
+
+    assert first_file not in os.listdir(tts_cache)
+    assert len(os.listdir(tts_cache)) == 1
+
+def test_strip_empty_drops_nested_empties():
+    """Test that empty strings, lists and dictionaries are dropped at every depth."""
+    state = {
+        "Paid": {
+            "meta": {"title": "Climb Log", "createdAt": ""},
+            "users": {"personas": [{"name": "", "frustrations": []}, {}], "segments": [""]},
+            "problem": {"statement": "Lost notes", "painPoints": ["", "No trends", []]}
+        }
+    }
+
+    assert voice_agent._strip_empty(state) == {
+        "Paid": {
+            "meta": {"title": "Climb Log"},
+            "problem": {"statement": "Lost notes", "painPoints": ["No trends"]}
+        }
+    }
+
+def test_strip_empty_keeps_falsy_values():
+    """Test that falsy values that aren't empty, such as 0 and False, are kept."""
+    state = {"metrics": {"target": 0, "launched": False, "notes": "", "scores": [0, False, ""]}}
+
+    assert voice_agent._strip_empty(state) == {"metrics": {"target": 0, "launched": False, "scores": [0, False]}}
+
+def test_create_prompt_without_design_information():
+    """Test that a state with nothing filled in falls back to the no-information context."""
+    agent = voice_agent.VoiceAgent.__new__(voice_agent.VoiceAgent)
+    empty_state = {"Paid": {"meta": {"title": ""}, "users": {"personas": [{}]}}}
+
+    for design_state in (empty_state, voice_agent.DEFAULT_DESIGN_STATE, {}):
+        prompt = agent._create_prompt("Hello", design_state)
+        assert "No existing design information." in prompt["user"]
+
+    prompt = agent._create_prompt("Hello", {"Paid": {"meta": {"title": "Climb Log", "createdAt": ""}}})
+    assert '{"Paid":{"meta":{"title":"Climb Log"}}}' in prompt["user"]